@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+
+from aiohttp import web
+
+OUTPUTS = {"1.x": 5, "2.x": 6, "3.x": 6}
+INVERT_FLAGS = {"1.x": (5, 6), "2.x": (6, 7)}
+
+
+def device_mac(index: int) -> str:
+    return "02:00:00:%02x:%02x:%02x" % (index >> 16 & 0xff, index >> 8 & 0xff, index & 0xff)
+
+
+def device_name(model: str, index: int) -> str:
+    return f"fake-{model}-{index}"
+
+
+@dataclass
+class FakeDeviceConfig:
+    model: str = "2.x"
+    latency: float = 0.02
+    jitter: float = 0.005
+    failure_rate: float = 0.0
+    timeout_rate: float = 0.0
+    single_threaded: bool = True
+
+
+class FakeDevice:
+    def __init__(self, index: int, config: FakeDeviceConfig):
+        self.index = index
+        self.config = config
+        self.model = config.model
+        self.mac = device_mac(index)
+        self.name = device_name(self.model, index)
+        self.outs = [0] * (OUTPUTS[self.model] + (1 if self.model in INVERT_FLAGS else 0))
+        self.inputs = [0, 0, 0, 0]
+        self.analog = {key: random.randint(150, 300) for key in self._analog_keys()}
+        self.uptime = random.randint(0, 100000)
+        self.requests = 0
+        self._lock = asyncio.Lock()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if self.config.single_threaded:
+            async with self._lock:
+                return await self._respond(request)
+        return await self._respond(request)
+
+    async def _respond(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        config = self.config
+        await asyncio.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+        if random.random() < config.timeout_rate:
+            await asyncio.sleep(30)
+        if random.random() < config.failure_rate:
+            return web.Response(status=500)
+
+        handler = self._routes().get(request.match_info["path"])
+        if handler is None:
+            return web.Response(status=404)
+        return handler(request)
+
+    def _routes(self) -> dict:
+        if self.model == "3.x":
+            return {
+                "json/all.json": lambda _: self._json({"mac": self.mac, "hw": "3.0", "sw": "1.60"}),
+                "json/network.json": lambda _: self._json({"sname": self.name}),
+                "json/status.json": lambda _: self._json(self._status_3x()),
+                "json/status_per.json": lambda _: self._json(self._status_per_3x()),
+                "outs.cgi": lambda request: self._json({"out": self._outs(request)}),
+            }
+        return {
+            "board.xml": lambda _: self._xml({"b6": self.mac, "b7": self.name}),
+            "st0.xml": lambda _: self._xml(self._st0()),
+            "st2.xml": lambda _: self._xml(self._st2()),
+            "outs.cgi": lambda request: web.Response(text=self._outs(request), content_type="text/plain"),
+        }
+
+    def _analog_keys(self) -> list[str]:
+        if self.model == "3.x":
+            return ["tem", "vin", "dthTemp", "dthHum", "bm280p", *[f"ds{i}" for i in range(1, 9)]]
+        return [f"ia{i}" for i in range(0, 18)]
+
+    def _tick(self) -> None:
+        self.uptime += 1
+        for key in self.analog:
+            self.analog[key] += random.choice((-1, 0, 0, 0, 1))
+        if random.random() < 0.05:
+            i = random.randrange(len(self.inputs))
+            self.inputs[i] ^= 1
+
+    def _outs(self, request: web.Request) -> str:
+        for key, value in request.query.items():
+            if key == "out" and self.model in INVERT_FLAGS:
+                on, off = INVERT_FLAGS[self.model]
+                self.outs[-1] = 0 if int(value) == on else 1 if int(value) == off else self.outs[-1]
+            elif key.startswith("out") and key[3:].isdigit() and int(key[3:]) < len(self.outs):
+                self.outs[int(key[3:])] = int(value)
+        return "".join(str(value) for value in self.outs)
+
+    def _st0(self) -> dict:
+        self._tick()
+        state = { f"out{i}": str(value) for i, value in enumerate(self.outs) }
+        state.update({ f"di{i}": "up" if value else "down" for i, value in enumerate(self.inputs) })
+        state.update({ key: str(value) for key, value in self.analog.items() })
+        state.update({
+            "sec0": str(self.uptime % 60),
+            "sec1": str(self.uptime // 60 % 60),
+            "sec2": str(self.uptime // 3600 % 24),
+            "sec3": str(self.uptime // 86400),
+            "sec4": "0",
+            "time": str(self.uptime),
+        })
+        return state
+
+    def _st2(self) -> dict:
+        outputs = OUTPUTS[self.model]
+        names = [f"T{i}" for i in range(6)] + [f"DI{i}" for i in range(4)]
+        st2 = {"mm": "m3", "d": "*".join(names), "ver": "2.13", "hw": "6"}
+        st2.update({ f"r{i}": "0" for i in range(outputs) })
+        st2.update({ f"r{outputs + i}": f"Out {i}" for i in range(outputs) })
+        if self.model == "1.x":
+            st2["ser"] = "1"
+        return st2
+
+    def _status_3x(self) -> dict:
+        status = {
+            "tname": "*".join([f"DS{i}" for i in range(1, 9)] + ["Temp", "Hum"]),
+            "pressureName": "Pressure",
+            "co2name": "CO2",
+        }
+        status.update({ f"oname{i}": f"Out {i}" for i in range(6) })
+        status.update({ f"iname{i}": f"Input {i}" for i in range(6) })
+        status.update({ f"pname{i}": f"PWM {i}" for i in range(4) })
+        status.update({ f"idname{i}": f"DI {i}" for i in range(4) })
+        status.update({ f"pown{i}": f"Power {i}" for i in range(4) })
+        return status
+
+    def _status_per_3x(self) -> dict:
+        self._tick()
+        state = { f"out{i}": value for i, value in enumerate(self.outs) }
+        state["ind"] = sum(value << i for i, value in enumerate(self.inputs))
+        state.update({ key: value for key, value in self.analog.items() })
+        state.update({ f"diff{i}": 0 for i in range(1, 4) })
+        state.update({ f"inpp{i}": 0 for i in range(1, 7) })
+        state.update({
+            "uptimeSeconds": self.uptime % 60,
+            "uptimeMinutes": self.uptime // 60 % 60,
+            "uptimeHours": self.uptime // 3600 % 24,
+            "uptimeDays": self.uptime // 86400,
+            "time": self.uptime,
+        })
+        return state
+
+    @staticmethod
+    def _xml(values: dict) -> web.Response:
+        body = "".join(f"<{key}>{value}</{key}>" for key, value in values.items())
+        # the firmware sends bare content types without a charset
+        return web.Response(
+            body=f'<?xml version="1.0" encoding="utf-8"?><response>{body}</response>'.encode(),
+            headers={"Content-Type": "text/xml"},
+        )
+
+    @staticmethod
+    def _json(values: dict) -> web.Response:
+        return web.Response(body=json.dumps(values).encode(), headers={"Content-Type": "application/json"})
+
+
+class FakeFleet:
+    def __init__(self, count: int, config: FakeDeviceConfig, host: str = "127.0.0.1", base_port: int = 18000):
+        self.host = host
+        self.base_port = base_port
+        self.devices = [FakeDevice(i, config) for i in range(count)]
+        self._runners = []
+
+    @property
+    def hosts(self) -> list[str]:
+        return [f"{self.host}:{self.base_port + i}" for i in range(len(self.devices))]
+
+    async def async_start(self) -> None:
+        for i, device in enumerate(self.devices):
+            runner = web.AppRunner(device.app(), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.host, self.base_port + i).start()
+            self._runners.append(runner)
+
+    async def async_stop(self) -> None:
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+
+def config_from_args(args) -> FakeDeviceConfig:
+    return FakeDeviceConfig(
+        model=args.model,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        timeout_rate=args.timeout_rate,
+        single_threaded=not args.concurrent,
+    )
+
+
+def add_device_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--model", choices=sorted(OUTPUTS), default="2.x")
+    parser.add_argument("--latency", type=float, default=0.02, help="response delay [s]")
+    parser.add_argument("--jitter", type=float, default=0.005, help="response delay jitter [s]")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="share of requests that never answer")
+    parser.add_argument("--concurrent", action="store_true", help="serve requests concurrently instead of one at a time")
+
+
+def device_argv(args) -> list[str]:
+    argv = [
+        "--model", args.model,
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--failure-rate", str(args.failure_rate),
+        "--timeout-rate", str(args.timeout_rate),
+    ]
+    if args.concurrent:
+        argv.append("--concurrent")
+    return argv
+
+
+async def _async_main(args) -> None:
+    fleet = FakeFleet(args.count, config_from_args(args), args.host, args.port)
+    await fleet.async_start()
+    print(f"Serving {args.count} fake {args.model} devices on {args.host}:{args.port}-{args.port + args.count - 1}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fleet.async_stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Emulate tinycontrol lan-kontroler boards")
+    add_device_arguments(parser)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18000)
+    asyncio.run(_async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
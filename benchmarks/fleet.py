@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from statistics import quantiles
+
+from homeassistant.const import (
+    CONF_MODEL,
+    CONF_HOST,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    ATTR_HW_VERSION,
+    ATTR_SW_VERSION,
+    CONF_MAC,
+)
+from homeassistant.core import HomeAssistant
+
+from custom_components.httpcontrol.binary_sensor import SENSORS_2x as BINARY_SENSORS_2x, SENSORS_3x as BINARY_SENSORS_3x
+from custom_components.httpcontrol.coordinator import HttpcontrolCoordinator
+from custom_components.httpcontrol.scheduler import HttpcontrolScheduler
+from custom_components.httpcontrol.sensor import SENSORS
+from custom_components.httpcontrol.switch import SWITCHES
+
+from .emulator import add_device_arguments, device_argv, device_mac, device_name
+
+
+# stand-in for the ConfigEntry attributes the coordinator reads
+class BenchEntry:
+    def __init__(self, index: int, host: str, model: str, scan_interval: int, options: dict):
+        self.entry_id = f"bench{index}"
+        self.title = device_name(model, index)
+        self.options = options
+        self.data = {
+            CONF_MODEL: model,
+            CONF_HOST: host,
+            CONF_USERNAME: "",
+            CONF_PASSWORD: "",
+            CONF_MAC: device_mac(index),
+            ATTR_HW_VERSION: model[0] + ".6",
+            ATTR_SW_VERSION: "bench",
+            CONF_SCAN_INTERVAL: scan_interval,
+        }
+
+    def async_create_background_task(self, hass: HomeAssistant, target, name: str, eager_start: bool = True):
+        return hass.async_create_background_task(target, name)
+
+
+def percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        return {"count": len(samples)}
+    cuts = quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def timed_refresh(coordinator: HttpcontrolCoordinator, samples: list[float]):
+    refresh = coordinator.async_refresh
+
+    async def _async_refresh() -> None:
+        start = time.perf_counter()
+        await refresh()
+        samples.append(time.perf_counter() - start)
+
+    return _async_refresh
+
+
+async def async_start_emulator(args) -> asyncio.subprocess.Process:
+    # a separate process keeps the emulator out of the CPU figures
+    emulator = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.emulator",
+        "--count", str(args.devices),
+        "--port", str(args.port),
+        *device_argv(args),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    await emulator.stdout.readline()
+    return emulator
+
+
+async def async_run(args) -> dict:
+    emulator = await async_start_emulator(args)
+    config_dir = tempfile.TemporaryDirectory()
+    hass = HomeAssistant(config_dir.name)
+    options = json.loads(args.options)
+    coordinators = []
+
+    try:
+        if args.memory:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if args.memory else 0
+
+        for i in range(args.devices):
+            entry = BenchEntry(i, f"127.0.0.1:{args.port + i}", args.model, args.interval, options)
+            coordinator = HttpcontrolCoordinator(hass, entry)
+            coordinator.async_add_decoders(SENSORS[args.model])
+            coordinator.async_add_decoders(BINARY_SENSORS_3x if args.model == "3.x" else BINARY_SENSORS_2x)
+            coordinator.async_add_decoders(SWITCHES[args.model])
+            coordinators.append(coordinator)
+        await asyncio.gather(*(coordinator.async_refresh_from_cache() for coordinator in coordinators))
+
+        memory_per_device = None
+        if args.memory:
+            memory_per_device = (tracemalloc.get_traced_memory()[0] - memory_before) / len(coordinators)
+            tracemalloc.stop()
+
+        poll_samples = []
+        command_samples = []
+        for coordinator in coordinators:
+            coordinator.async_refresh = timed_refresh(coordinator, poll_samples)
+
+        scheduler = HttpcontrolScheduler(hass, args.concurrency)
+        for coordinator in coordinators:
+            scheduler.async_add(coordinator)
+
+        async def _async_commands() -> None:
+            while True:
+                await asyncio.sleep(args.command_interval)
+                coordinator = random.choice(coordinators)
+                start = time.perf_counter()
+                try:
+                    await coordinator.async_set_out("out0", random.randint(0, 1))
+                except Exception:
+                    continue
+                command_samples.append(time.perf_counter() - start)
+
+        commands = asyncio.create_task(_async_commands()) if args.command_interval > 0 else None
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        if commands is not None:
+            commands.cancel()
+        # taken before teardown, removing the devices empties the scheduler
+        scheduler_stats = scheduler.stats
+        for coordinator in list(coordinators):
+            scheduler.async_remove(coordinator)
+
+        polls = len(poll_samples)
+        return {
+            "devices": args.devices,
+            "model": args.model,
+            "duration_s": round(wall, 2),
+            "polls": polls,
+            "polls_per_s": round(polls / wall, 2),
+            "poll_latency": percentiles(poll_samples),
+            "command_latency": percentiles(command_samples),
+            "cpu_per_poll_ms": round(cpu / polls * 1000, 3) if polls else None,
+            "memory_per_device_kib": round(memory_per_device / 1024, 1) if memory_per_device is not None else None,
+            "scheduler": scheduler_stats,
+            "failed_devices": sum(not coordinator.last_update_success for coordinator in coordinators),
+        }
+    finally:
+        for coordinator in coordinators:
+            await coordinator.async_close()
+        await hass.async_stop(force=True)
+        emulator.terminate()
+        await emulator.wait()
+        config_dir.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Poll a fleet of emulated boards with HttpcontrolCoordinator")
+    add_device_arguments(parser)
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 100], help="fleet sizes to run")
+    parser.add_argument("--interval", type=int, default=5, help="scan interval per device [s]")
+    parser.add_argument("--duration", type=float, default=30, help="measurement time per fleet size [s]")
+    parser.add_argument("--concurrency", type=int, default=8, help="scheduler poll concurrency")
+    parser.add_argument("--command-interval", type=float, default=1, help="delay between output commands [s], 0 disables")
+    parser.add_argument("--options", default="{}", help="config entry options as JSON")
+    parser.add_argument("--memory", action="store_true", help="measure memory per device with tracemalloc")
+    parser.add_argument("--port", type=int, default=18000)
+    args = parser.parse_args()
+
+    for devices in args.devices:
+        args_for_run = argparse.Namespace(**{**vars(args), "devices": devices})
+        print(json.dumps(asyncio.run(async_run(args_for_run))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.httpcontrol.binary_sensor import (
+    SENSORS_2x as BINARY_SENSORS_2x,
+    SENSORS_3x as BINARY_SENSORS_3x,
+    HttpcontrolBinarySensor,
+)
+from custom_components.httpcontrol.coordinator import HttpcontrolCoordinator
+from custom_components.httpcontrol.parser import parse_json, parse_xml
+from custom_components.httpcontrol.sensor import SENSORS, HttpcontrolSensor
+
+from .fleet import BenchEntry
+
+PAYLOADS = Path(__file__).parent / "payloads"
+BASELINE = Path(__file__).parent / "baseline.json"
+PAYLOAD_FILES = {"2.x": "st0.xml", "3.x": "status_per.json"}
+PARSERS = {"2.x": parse_xml, "3.x": parse_json}
+BINARY_SENSORS = {"2.x": BINARY_SENSORS_2x, "3.x": BINARY_SENSORS_3x}
+REPEAT = 5
+# allowed slowdown against the baseline before --compare fails
+TOLERANCE = 1.25
+
+
+def make_coordinator(hass: HomeAssistant, model: str) -> HttpcontrolCoordinator:
+    coordinator = HttpcontrolCoordinator(hass, BenchEntry(0, "127.0.0.1", model, 5, {}))
+    coordinator.async_add_decoders(SENSORS[model])
+    coordinator.async_add_decoders(BINARY_SENSORS[model])
+    return coordinator
+
+
+def model_benchmarks(hass: HomeAssistant, model: str) -> dict:
+    body = (PAYLOADS / PAYLOAD_FILES[model]).read_bytes()
+    parse = PARSERS[model]
+    coordinator = make_coordinator(hass, model)
+    skip = coordinator._skip_keys
+
+    state = parse(body, skip)
+    coordinator._split_ind(state)
+    coordinator.data = coordinator._make_data(state)
+    entities = [
+        *(HttpcontrolSensor(coordinator, description) for description in SENSORS[model] if description.key in state),
+        *(HttpcontrolBinarySensor(coordinator, description) for description in BINARY_SENSORS[model] if description.key in state),
+    ]
+    decoders = [(description.value_fn, state[description.key]) for description in SENSORS[model] if description.key in state]
+    decoders += [(description.value_fn, state[description.key]) for description in BINARY_SENSORS[model] if description.key in state]
+    raw = parse(body, skip)
+    polled = dict(state)
+    changed = set(list(coordinator.decoders.keys() & state.keys())[:3])
+
+    def _value_fns() -> None:
+        for value_fn, value in decoders:
+            try:
+                value_fn(value)
+            except (TypeError, ValueError):
+                pass
+
+    def _attributes() -> None:
+        for entity in entities:
+            entity.extra_state_attributes
+
+    benchmarks = {
+        f"{model} parse": lambda: parse(body),
+        f"{model} parse+skip": lambda: parse(body, skip),
+        f"{model} value_fn": _value_fns,
+        f"{model} decode all": lambda: coordinator._decode(state),
+        f"{model} decode changed": lambda: coordinator._decode(state, changed),
+        f"{model} state update": lambda: coordinator.data.state.replace(polled),
+        f"{model} extra_state_attributes": _attributes,
+    }
+    if coordinator.is_3x():
+        benchmarks[f"{model} split_ind"] = lambda: coordinator._split_ind(dict(raw))
+    return benchmarks
+
+
+def measure_memory(hass: HomeAssistant, model: str, devices: int = 100) -> dict:
+    body = (PAYLOADS / PAYLOAD_FILES[model]).read_bytes()
+    coordinators = [make_coordinator(hass, model) for _ in range(devices)]
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for coordinator in coordinators:
+        state = PARSERS[model](body, coordinator._skip_keys)
+        coordinator._split_ind(state)
+        coordinator.data = coordinator._make_data(state)
+    data = tracemalloc.get_traced_memory()[0]
+    entities = [
+        HttpcontrolSensor(coordinator, description)
+        for coordinator in coordinators
+        for description in SENSORS[model]
+        if description.key in coordinator.data.state
+    ]
+    end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        f"{model} data bytes per device": round((data - start) / devices),
+        f"{model} bytes per sensor entity": round((end - data) / len(entities)),
+    }
+
+
+def measure(benchmark) -> float:
+    timer = timeit.Timer(benchmark)
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEAT, number)) / number * 1e6
+
+
+async def async_run(models: list[str], selected: str | None, memory: bool = False) -> dict:
+    config_dir = tempfile.TemporaryDirectory()
+    hass = HomeAssistant(config_dir.name)
+    try:
+        if memory:
+            results = {}
+            for model in models:
+                results.update(measure_memory(hass, model))
+            return results
+        benchmarks = {}
+        for model in models:
+            benchmarks.update(model_benchmarks(hass, model))
+        return {
+            name: round(measure(benchmark), 3)
+            for name, benchmark in benchmarks.items()
+            if selected is None or selected in name
+        }
+    finally:
+        await hass.async_stop(force=True)
+        config_dir.cleanup()
+
+
+def compare(results: dict, baseline: dict) -> bool:
+    ok = True
+    for name, us in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:40} {us:10.3f} us  (no baseline)")
+            continue
+        ratio = us / reference
+        regressed = ratio > TOLERANCE
+        ok = ok and not regressed
+        print(f"{name:40} {us:10.3f} us  {reference:10.3f} us  x{ratio:.2f}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the per-poll parse/decode/attributes hot path")
+    parser.add_argument("--model", choices=sorted(PAYLOAD_FILES), nargs="+", default=sorted(PAYLOAD_FILES))
+    parser.add_argument("-k", dest="selected", help="only run benchmarks whose name contains this")
+    parser.add_argument("--memory", action="store_true", help="report memory per device and per entity instead of timings")
+    parser.add_argument("--save", action="store_true", help=f"record the results as the new {BASELINE.name}")
+    parser.add_argument("--compare", action="store_true", help=f"fail when a result is more than {TOLERANCE}x its baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_run(args.model, args.selected, args.memory))
+    if args.memory:
+        print(json.dumps(results, indent=2))
+        return
+    baseline = json.loads(BASELINE.read_text())
+
+    if args.save:
+        baseline["python"] = platform.python_version()
+        baseline["machine"] = platform.machine()
+        baseline["results_us"] = {**baseline["results_us"], **results}
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    if not compare(results, baseline["results_us"]) and args.compare:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
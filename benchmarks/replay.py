@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from homeassistant.const import ATTR_HW_VERSION, ATTR_SW_VERSION, CONF_MAC, CONF_MODEL
+from homeassistant.core import HomeAssistant
+
+from custom_components.httpcontrol.binary_sensor import SENSORS_2x as BINARY_SENSORS_2x, SENSORS_3x as BINARY_SENSORS_3x
+from custom_components.httpcontrol.coordinator import STATUS_PATHS, HttpcontrolCoordinator
+from custom_components.httpcontrol.sensor import SENSORS
+from custom_components.httpcontrol.switch import SWITCHES
+from custom_components.httpcontrol.trace import HttpcontrolTraceReplay, load_trace
+
+from .fleet import BenchEntry
+
+
+def make_coordinator(hass: HomeAssistant, index: int, meta: dict, records: list[dict], speed: float) -> HttpcontrolCoordinator:
+    model = meta["model"]
+    entry = BenchEntry(index, "replay", model, meta["scan_interval"], {})
+    entry.data.update({
+        CONF_MAC: meta["mac"],
+        ATTR_HW_VERSION: meta["hw_version"],
+        ATTR_SW_VERSION: meta["sw_version"],
+    })
+    coordinator = HttpcontrolCoordinator(hass, entry)
+    coordinator.client.replay = HttpcontrolTraceReplay(records, speed)
+    coordinator.async_add_decoders(SENSORS[model])
+    coordinator.async_add_decoders(BINARY_SENSORS_3x if model == "3.x" else BINARY_SENSORS_2x)
+    coordinator.async_add_decoders(SWITCHES[model])
+    return coordinator
+
+
+async def async_replay(coordinator: HttpcontrolCoordinator, records: list[dict], polls: int, speed: float) -> int:
+    if speed <= 0:
+        for _ in range(polls):
+            await coordinator.async_refresh()
+        return polls
+
+    # follow the recorded poll cadence
+    path = STATUS_PATHS[coordinator.entry.data[CONF_MODEL]]
+    offsets = [record["t"] for record in records if record["path"] == path]
+    start = time.perf_counter()
+    for offset in offsets:
+        await asyncio.sleep(max(0.0, (offset - offsets[0]) / speed - (time.perf_counter() - start)))
+        await coordinator.async_refresh()
+    return len(offsets)
+
+
+async def async_run(args, path: str) -> dict:
+    meta, records = load_trace(path)
+    config_dir = tempfile.TemporaryDirectory()
+    hass = HomeAssistant(config_dir.name)
+    coordinators = []
+
+    try:
+        for i in range(args.copies):
+            coordinators.append(make_coordinator(hass, i, meta, records, args.speed))
+        await asyncio.gather(*(coordinator.async_refresh_from_cache() for coordinator in coordinators))
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        polls = sum(await asyncio.gather(*(
+            async_replay(coordinator, records, args.polls, args.speed) for coordinator in coordinators
+        )))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        return {
+            "trace": path,
+            "model": meta["model"],
+            "sw_version": meta["sw_version"],
+            "records": len(records),
+            "copies": args.copies,
+            "polls": polls,
+            "polls_per_s": round(polls / wall, 2),
+            "cpu_per_poll_ms": round(cpu / polls * 1000, 3) if polls else None,
+            "failed_devices": sum(not coordinator.last_update_success for coordinator in coordinators),
+        }
+    finally:
+        for coordinator in coordinators:
+            await coordinator.async_close()
+        await hass.async_stop(force=True)
+        config_dir.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Feed recorded device traces back into HttpcontrolCoordinator")
+    parser.add_argument("traces", nargs="+", help="trace files written with the trace option enabled")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed relative to the recording, 0 runs as fast as possible")
+    parser.add_argument("--polls", type=int, default=1000, help="polls per coordinator when running as fast as possible")
+    parser.add_argument("--copies", type=int, default=1, help="coordinators replaying each trace at once")
+    args = parser.parse_args()
+
+    for path in args.traces:
+        print(json.dumps(asyncio.run(async_run(args, path))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,198 @@
+from aiohttp import web
+import voluptuous as vol
+
+from homeassistant.components import webhook
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform, CONF_WEBHOOK_ID, EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, LOGGER
-from .coordinator import HttpcontrolCoordinator
+from .const import (
+    DOMAIN,
+    LOGGER,
+    DATA_SCHEDULER,
+    DATA_FLEET,
+    SERVICE_PROFILE,
+    SERVICE_AGGREGATE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DURATION,
+    ATTR_POLLS,
+    DEFAULT_PROFILE_DURATION,
+    ATTR_STAT,
+    ATTR_KEYS,
+    ATTR_MODEL,
+    ATTR_LABEL,
+    ATTR_DEVICE_CLASS,
+    ATTR_GROUP_BY,
+)
+from .coordinator import HttpcontrolCoordinator, STORAGE_VERSION, storage_key
+from .fleet import HttpcontrolFleet, GROUP_BY, STATS, is_fleet_entry
+from .scheduler import HttpcontrolScheduler
 
 PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SWITCH]
+FLEET_PLATFORMS = [Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600)),
+    vol.Optional(ATTR_POLLS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+AGGREGATE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_STAT): vol.In(STATS),
+    vol.Optional(ATTR_KEYS, default="*"): cv.string,
+    vol.Optional(ATTR_MODEL): cv.string,
+    vol.Optional(ATTR_LABEL): cv.string,
+    vol.Optional(ATTR_DEVICE_CLASS): cv.string,
+    vol.Optional(ATTR_GROUP_BY): vol.In(GROUP_BY),
+})
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        entry = hass.config_entries.async_get_entry(entry_id)
+        if entry is None or entry.domain != DOMAIN or entry_id not in hass.data.get(DOMAIN, {}):
+            raise ServiceValidationError(f"{entry_id} is not a loaded {DOMAIN} entry")
+        coordinator: HttpcontrolCoordinator = hass.data[DOMAIN][entry_id]
+
+        profiler = await coordinator.async_profile(call.data[ATTR_DURATION], call.data.get(ATTR_POLLS))
+        name = hass.config.path(f"{DOMAIN}_profile_{entry_id}_{dt_util.now():%Y%m%d%H%M%S}")
+        await hass.async_add_executor_job(profiler.write, f"{name}.prof", f"{name}.json")
+        LOGGER.info("Profile of %s written to %s.prof", entry.title, name)
+        return {
+            "stats_file": f"{name}.prof",
+            "breakdown": profiler.breakdown(),
+        }
+
+    async def async_aggregate(call: ServiceCall) -> ServiceResponse:
+        return hass.data[DOMAIN][DATA_FLEET].query(
+            call.data[ATTR_STAT],
+            call.data[ATTR_KEYS],
+            call.data.get(ATTR_MODEL),
+            call.data.get(ATTR_LABEL),
+            call.data.get(ATTR_DEVICE_CLASS),
+            call.data.get(ATTR_GROUP_BY),
+        )
+
+    # the fleet store outlives any single device entry
+    hass.data.setdefault(DOMAIN, {})[DATA_FLEET] = HttpcontrolFleet(hass)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_AGGREGATE,
+        async_aggregate,
+        schema=AGGREGATE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    if is_fleet_entry(entry):
+        await hass.config_entries.async_forward_entry_setups(entry, FLEET_PLATFORMS)
+        return True
+
     coordinator = HttpcontrolCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_load_cache():
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh_from_cache(),
+            f"{coordinator.name} refresh",
+        )
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await coordinator.async_close()
+            raise
+
+    data = hass.data.setdefault(DOMAIN, {})
+    data[entry.entry_id] = coordinator
+    if DATA_SCHEDULER not in data:
+        data[DATA_SCHEDULER] = HttpcontrolScheduler(hass)
+    data[DATA_SCHEDULER].async_add(coordinator)
+    data[DATA_FLEET].async_add(coordinator)
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if CONF_WEBHOOK_ID not in entry.data:
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_WEBHOOK_ID: webhook.async_generate_id()})
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        entry.title,
+        entry.data[CONF_WEBHOOK_ID],
+        async_handle_webhook,
+        local_only=True,
+        allowed_methods=("GET", "POST"),
+    )
+    entry.async_on_unload(lambda: webhook.async_unregister(hass, entry.data[CONF_WEBHOOK_ID]))
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # entries are not unloaded on shutdown, the client owns its session
+    async def _async_close_client(_event: Event) -> None:
+        await coordinator.client.async_close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_client))
+
     return True
 
 
+async def async_handle_webhook(hass: HomeAssistant, webhook_id: str, request: web.Request) -> web.Response:
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.data.get(CONF_WEBHOOK_ID) == webhook_id:
+            break
+    else:
+        return web.Response(status=404)
+    if (coordinator := hass.data[DOMAIN].get(entry.entry_id)) is None or coordinator.data is None:
+        return web.Response(status=503)
+
+    payload = dict(request.query)
+    if request.method == "POST" and request.can_read_body:
+        if request.content_type == "application/json":
+            body = await request.json()
+            if isinstance(body, dict):
+                payload.update(body)
+        else:
+            payload.update(await request.post())
+    LOGGER.debug("Webhook event for %s: %s", entry.title, payload)
+    try:
+        await coordinator.async_handle_webhook(payload)
+    except ValueError as exc:
+        return web.Response(status=400, text=str(exc))
+    return web.Response(status=200)
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    if is_fleet_entry(entry):
+        return await hass.config_entries.async_unload_platforms(entry, FLEET_PLATFORMS)
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        del hass.data[DOMAIN][entry.entry_id]
+        data = hass.data[DOMAIN]
+        coordinator = data.pop(entry.entry_id)
+        data[DATA_SCHEDULER].async_remove(coordinator)
+        if data[DATA_SCHEDULER].empty:
+            del data[DATA_SCHEDULER]
+        data[DATA_FLEET].async_remove(coordinator)
+        await coordinator.async_close()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await Store(hass, STORAGE_VERSION, storage_key(entry)).async_remove()
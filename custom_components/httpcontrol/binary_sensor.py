@@ -42,10 +42,11 @@ async def async_setup_entry(
     coordinator: HttpcontrolCoordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities = SENSORS_3x if coordinator.is_3x() else SENSORS_2x
+    coordinator.async_add_decoders(entities)
     async_add_entities(
         HttpcontrolBinarySensor(coordinator, entity)
         for entity in entities
-        if entity.key in coordinator.data.state
+        if entity.key in coordinator.available_keys
     )
 
 class HttpcontrolBinarySensor(HttpcontrolEntity, BinarySensorEntity):
@@ -56,4 +57,4 @@ class HttpcontrolBinarySensor(HttpcontrolEntity, BinarySensorEntity):
 
     @property
     def is_on(self) -> bool | None:
-        return self.entity_description.value_fn(self.coordinator.data.state[self.entity_description.key])
+        return self.coordinator.data.values.get(self.entity_description.key)
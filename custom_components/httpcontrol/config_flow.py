@@ -1,24 +1,48 @@
+import asyncio
 from typing import Any
 
 import voluptuous as vol
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow, SOURCE_IMPORT
 from homeassistant.const import (
     CONF_HOST,
     CONF_MAC,
     CONF_PASSWORD,
     CONF_MODEL,
+    CONF_NAME,
     CONF_USERNAME,
     CONF_SCAN_INTERVAL,
+    CONF_WEBHOOK_ID,
     ATTR_HW_VERSION,
     ATTR_SW_VERSION,
 )
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.device_registry import format_mac
 
-from .const import DOMAIN
-from .requests import async_get, HttpcontrolAuthError
+from .const import (
+    DOMAIN,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_STALENESS,
+    DEFAULT_MAX_STALENESS,
+    CONF_ADAPTIVE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_NETWORK,
+    CONF_DEVICES,
+    CONF_HEDGE,
+    CONF_TRACE,
+    FLEET_UNIQUE_ID,
+    FLEET_NAME,
+)
+from .discovery import async_probe_cached, async_scan, network_hosts, HttpcontrolProbe, HttpcontrolProbeError
+from .fleet import is_fleet_entry
+from .requests import HttpcontrolAuthError
 
 class HttpcontrolFlowHandler(ConfigFlow, domain=DOMAIN):
     VERSION = 1
@@ -32,59 +56,147 @@ class HttpcontrolFlowHandler(ConfigFlow, domain=DOMAIN):
     sw_version: str
     model: str
     scan_interval: int
+    found: dict[str, tuple[str, HttpcontrolProbe]]
+    hosts: list[str]
+    scan_task: asyncio.Task | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return HttpcontrolOptionsFlow(config_entry)
+
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry: ConfigEntry) -> bool:
+        return not is_fleet_entry(config_entry)
 
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        menu_options = ["manual", "scan"]
+        if FLEET_UNIQUE_ID not in self._async_current_ids():
+            menu_options.append("fleet")
+        return self.async_show_menu(step_id="user", menu_options=menu_options)
+
+    async def async_step_manual(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         if user_input is None:
-            return self.async_show_form(step_id="user", data_schema=self._schema())
+            return self.async_show_form(step_id="manual", data_schema=self._schema())
 
         self.host = user_input[CONF_HOST]
         self.username = user_input[CONF_USERNAME]
         self.password = user_input[CONF_PASSWORD]
         self.scan_interval = user_input[CONF_SCAN_INTERVAL]
 
-        errors = {}
-        try:
-            await self._async_get_version(raise_on_progress=False)
-        except HttpcontrolAuthError:
-            errors[CONF_USERNAME] = "invalid_auth"
-            errors[CONF_PASSWORD] = "invalid_auth"
+        errors = await self._async_get_version()
         if errors:
-            return self.async_show_form(step_id="user", data_schema=self._schema(), errors=errors)
+            return self.async_show_form(step_id="manual", data_schema=self._schema(), errors=errors)
+        await self.async_set_unique_id(self.mac, raise_on_progress=False)
+        self._abort_if_unique_id_configured(updates=self._to_data())
+        return self.async_create_entry(title=self.name, data=self._to_data())
+
+    async def async_step_scan(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        if user_input is None:
+            return self.async_show_form(step_id="scan", data_schema=self._scan_schema())
+
+        self.username = user_input.get(CONF_USERNAME)
+        self.password = user_input.get(CONF_PASSWORD)
+        self.scan_interval = user_input[CONF_SCAN_INTERVAL]
+        try:
+            hosts = network_hosts(user_input[CONF_NETWORK])
+        except ValueError:
+            return self.async_show_form(step_id="scan", data_schema=self._scan_schema(user_input), errors={CONF_NETWORK: "invalid_network"})
+
+        self.hosts = hosts
+        return await self.async_step_scan_progress()
+
+    async def async_step_scan_progress(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        # a large network takes a while, the scan runs as a task behind a progress step
+        if self.scan_task is None:
+            self.scan_task = self.hass.async_create_task(
+                async_scan(async_get_clientsession(self.hass), self.hosts, self.username, self.password)
+            )
+        if not self.scan_task.done():
+            return self.async_show_progress(
+                step_id="scan_progress",
+                progress_action="scan",
+                progress_task=self.scan_task,
+                description_placeholders={"hosts": str(len(self.hosts))},
+            )
+
+        probes = self.scan_task.result()
+        self.scan_task = None
+        configured = self._async_current_ids()
+        self.found = { probe.mac: (host, probe) for host, probe in probes.items() if probe.mac not in configured }
+        return self.async_show_progress_done(next_step_id="scan_select")
+
+    async def async_step_scan_select(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        if not self.found:
+            return self.async_abort(reason="no_devices_found")
+        if user_input is None:
+            devices = { mac: f"{probe.name} ({host}, {probe.model})" for mac, (host, probe) in self.found.items() }
+            return self.async_show_form(step_id="scan_select", data_schema=vol.Schema({
+                vol.Required(CONF_DEVICES, default=list(devices)): cv.multi_select(devices),
+            }))
+
+        if not (selected := user_input[CONF_DEVICES]):
+            return self.async_abort(reason="no_devices_found")
+        for mac in selected[1:]:
+            self._use_probe(*self.found[mac])
+            self.hass.async_create_task(self.hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_IMPORT}, data={**self._to_data(), CONF_NAME: self.name},
+            ))
+
+        self._use_probe(*self.found[selected[0]])
+        await self.async_set_unique_id(self.mac, raise_on_progress=False)
+        self._abort_if_unique_id_configured()
         return self.async_create_entry(title=self.name, data=self._to_data())
 
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        data = dict(import_data)
+        title = data.pop(CONF_NAME, data[CONF_HOST])
+        await self.async_set_unique_id(data[CONF_MAC])
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=title, data=data)
+
+    async def async_step_fleet(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        # opt-in, holds the fleet aggregate sensors and stays deleted once removed
+        await self.async_set_unique_id(FLEET_UNIQUE_ID)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=FLEET_NAME, data={})
+
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None):
         config = self._get_reconfigure_entry()
+        if is_fleet_entry(config):
+            return self.async_abort(reason="not_supported")
         if user_input is None:
             return self.async_show_form(step_id="reconfigure", data_schema=self._schema(config.data))
-        return self.async_update_reload_and_abort(config, data_updates=user_input)
 
-    async def _async_get_version(self, raise_on_progress: bool = True) -> None:
+        self.host = user_input[CONF_HOST]
+        self.username = user_input.get(CONF_USERNAME)
+        self.password = user_input.get(CONF_PASSWORD)
+        self.scan_interval = user_input[CONF_SCAN_INTERVAL]
+        if errors := await self._async_get_version():
+            return self.async_show_form(step_id="reconfigure", data_schema=self._schema(user_input), errors=errors)
+        if self.mac != config.unique_id:
+            return self.async_abort(reason="wrong_device")
+        return self.async_update_reload_and_abort(config, data_updates=self._to_data())
+
+    async def _async_get_version(self) -> dict[str, str]:
         try:
-          all = await self._async_get("json/all.json")
-          self.model = "3.x"
-          self.mac = format_mac(all["mac"])
-          self.hw_version = all["hw"]
-          self.sw_version = all["sw"]
-          network = await self._async_get("json/network.json")
-          self.name = network["sname"]
-        except:
-          board = await self._async_get("board.xml")
-          self.mac = format_mac(board["b6"])
-          self.name = board["b7"]
-          st2 = await self._async_get("st2.xml")
-          self.sw_version = st2["ver"]
-          if "ser" in st2:
-              self.model = "1.x"
-              self.hw_version = "1." + st2["hw"]
-          else:
-              self.model = "2.x"
-              self.hw_version = "2." + st2["hw"]
-        await self.async_set_unique_id(self.mac, raise_on_progress=raise_on_progress)
-        self._abort_if_unique_id_configured(updates=self._to_data())
+            probe = await async_probe_cached(self.hass, self.host, self.username, self.password)
+        except HttpcontrolAuthError:
+            return {CONF_USERNAME: "invalid_auth", CONF_PASSWORD: "invalid_auth"}
+        except HttpcontrolProbeError:
+            return {"base": "cannot_connect"}
+        self._use_probe(self.host, probe)
+        return {}
 
-    async def _async_get(self, path: str):
-        session = async_get_clientsession(self.hass)
-        return await async_get(path, self.host, self.username, self.password, session)
+    @callback
+    def _use_probe(self, host: str, probe: HttpcontrolProbe) -> None:
+        self.host = host
+        self.model = probe.model
+        self.mac = probe.mac
+        self.name = probe.name
+        self.hw_version = probe.hw_version
+        self.sw_version = probe.sw_version
 
     @callback
     def _schema(self, data = {}):
@@ -95,6 +207,16 @@ class HttpcontrolFlowHandler(ConfigFlow, domain=DOMAIN):
             vol.Optional(CONF_SCAN_INTERVAL, default=data.get(CONF_SCAN_INTERVAL, 30)): vol.All(int, vol.Range(min=1)),
         })
 
+    @callback
+    def _scan_schema(self, data = {}):
+        return vol.Schema({
+            vol.Required(CONF_NETWORK, default=data.get(CONF_NETWORK)): str,
+            # most boards run without a password, a None default would fail validation
+            vol.Optional(CONF_USERNAME, default=data.get(CONF_USERNAME, "")): str,
+            vol.Optional(CONF_PASSWORD, default=data.get(CONF_PASSWORD, "")): str,
+            vol.Optional(CONF_SCAN_INTERVAL, default=data.get(CONF_SCAN_INTERVAL, 30)): vol.All(int, vol.Range(min=1)),
+        })
+
     @callback
     def _to_data(self) -> dict[str, Any]:
         return {
@@ -107,3 +229,46 @@ class HttpcontrolFlowHandler(ConfigFlow, domain=DOMAIN):
             ATTR_SW_VERSION: self.sw_version,
             CONF_SCAN_INTERVAL: self.scan_interval,
         }
+
+
+class HttpcontrolOptionsFlow(OptionsFlow):
+    # OptionsFlow.config_entry only exists from 2024.12
+    def __init__(self, entry: ConfigEntry):
+        self.entry = entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        errors = {}
+        scan_interval = self.entry.data[CONF_SCAN_INTERVAL]
+        if user_input is not None:
+            min_interval = user_input[CONF_MIN_SCAN_INTERVAL]
+            max_interval = user_input[CONF_MAX_SCAN_INTERVAL]
+            if min_interval > max_interval:
+                errors["base"] = "invalid_scan_range"
+            elif user_input[CONF_ADAPTIVE] and not min_interval <= scan_interval <= max_interval:
+                errors["base"] = "scan_interval_out_of_range"
+            else:
+                return self.async_create_entry(data=user_input)
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self._schema(user_input or self.entry.options),
+            errors=errors,
+            description_placeholders={
+                "webhook_path": webhook.async_generate_path(self.entry.data.get(CONF_WEBHOOK_ID, "")),
+                "scan_interval": str(scan_interval),
+            },
+        )
+
+    @callback
+    def _schema(self, options):
+        return vol.Schema({
+            # left empty, every analog sensor keeps its own deadband and interval
+            vol.Optional(CONF_DEADBAND, description={"suggested_value": options.get(CONF_DEADBAND)}): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(CONF_DEADBAND_PERCENT, description={"suggested_value": options.get(CONF_DEADBAND_PERCENT)}): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+            vol.Optional(CONF_MIN_PUBLISH_INTERVAL, description={"suggested_value": options.get(CONF_MIN_PUBLISH_INTERVAL)}): vol.All(int, vol.Range(min=0)),
+            vol.Optional(CONF_MAX_STALENESS, default=options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)): vol.All(int, vol.Range(min=0)),
+            vol.Optional(CONF_ADAPTIVE, default=options.get(CONF_ADAPTIVE, False)): bool,
+            vol.Optional(CONF_MIN_SCAN_INTERVAL, default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1)),
+            vol.Optional(CONF_MAX_SCAN_INTERVAL, default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1)),
+            vol.Optional(CONF_HEDGE, default=options.get(CONF_HEDGE, False)): bool,
+            vol.Optional(CONF_TRACE, default=options.get(CONF_TRACE, False)): bool,
+        })
@@ -2,3 +2,47 @@ import logging
 
 DOMAIN = "httpcontrol"
 LOGGER = logging.getLogger(__package__)
+
+DATA_SCHEDULER = "scheduler"
+DATA_PROBE_CACHE = "probe_cache"
+DATA_FLEET = "fleet"
+
+# the aggregate sensors live on a config entry of their own
+FLEET_UNIQUE_ID = "fleet"
+FLEET_NAME = "tinycontrol fleet"
+
+CONF_DEADBAND = "deadband"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_MIN_PUBLISH_INTERVAL = "min_publish_interval"
+CONF_MAX_STALENESS = "max_staleness"
+
+DEFAULT_MAX_STALENESS = 900
+
+CONF_ADAPTIVE = "adaptive"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+
+DEFAULT_MIN_SCAN_INTERVAL = 2
+DEFAULT_MAX_SCAN_INTERVAL = 300
+
+CONF_NETWORK = "network"
+CONF_DEVICES = "devices"
+
+CONF_HEDGE = "hedge"
+
+CONF_TRACE = "trace"
+
+SERVICE_PROFILE = "profile"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_DURATION = "duration"
+ATTR_POLLS = "polls"
+
+DEFAULT_PROFILE_DURATION = 60
+
+SERVICE_AGGREGATE = "aggregate"
+ATTR_STAT = "stat"
+ATTR_KEYS = "keys"
+ATTR_MODEL = "model"
+ATTR_LABEL = "label"
+ATTR_DEVICE_CLASS = "device_class"
+ATTR_GROUP_BY = "group_by"
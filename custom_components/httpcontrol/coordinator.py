@@ -1,5 +1,9 @@
+import asyncio
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import timedelta
+from time import monotonic
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -12,23 +16,80 @@ from homeassistant.const import (
     ATTR_SW_VERSION,
     CONF_MAC,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, LOGGER
-from .requests import async_get
+from .const import (
+    DOMAIN,
+    LOGGER,
+    CONF_ADAPTIVE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_HEDGE,
+    CONF_TRACE,
+)
+from .requests import HttpcontrolClient, HttpcontrolRequestDropped, PRIORITY_COMMAND, PRIORITY_METADATA, PRIORITY_POLL
+from .state import HttpcontrolState, state_layout
+from .profiler import HttpcontrolProfiler, STAGE_LISTENERS, STAGE_POSTPROCESS, profile_stage
+from .trace import HttpcontrolTraceRecorder
+
+# adaptive polling: polls kept at the minimum interval after activity,
+# growth factor while idle and relative analog change counted as activity
+ADAPTIVE_BOOST_POLLS = 5
+ADAPTIVE_BACKOFF = 1.5
+ADAPTIVE_ANALOG_THRESHOLD = 0.05
+SWITCHING_PREFIXES = ("out", "di", "ind")
+
+# outs.cgi writes issued within this window [s] are sent as a single request
+COMMAND_COALESCE_WINDOW = 0.05
+
+STATUS_PATHS = {
+    "1.x": "st0.xml",
+    "2.x": "st0.xml",
+    "3.x": "json/status_per.json",
+}
+
+STORAGE_VERSION = 1
+# the cache is written at most this often [s], sooner when metadata or keys change
+CACHE_SAVE_DELAY = 60
+
+# uptime counters in seconds, minutes, hours and days
+UPTIME_KEYS = {
+    "1.x": ("sec0", "sec1", "sec2", "sec3"),
+    "2.x": ("sec0", "sec1", "sec2", "sec3"),
+    "3.x": ("uptimeSeconds", "uptimeMinutes", "uptimeHours", "uptimeDays"),
+}
+UPTIME_WEIGHTS = (1, 60, 3600, 86400)
+METADATA_REFRESH_INTERVAL = 3600
+
+# keys the 3.x "ind" bitmask is split into
+IND_KEYS = ("ind0", "ind1", "ind2", "ind3")
+
+SKIP_KEYS = frozenset(["uptimeSeconds", "uptimeMinutes", "uptimeHours", "uptimeDays", "time", "sec0", "sec1", "sec2", "sec3", "sec4"])
+
 
-SKIP_KEYS = ["uptimeSeconds", "uptimeMinutes", "uptimeHours", "uptimeDays", "time", "sec0", "sec1", "sec2", "sec3", "sec4"]
+def trace_path(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    return hass.config.path(f"{DOMAIN}_trace_{entry.entry_id}.jsonl.gz")
 
 
-@dataclass
+def storage_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}"
+
+
+@dataclass(slots=True)
 class HttpcontrolData:
     model: str
     hw_version: str
     sw_version: str
     mac: str
-    state: dict
+    # raw and decoded values, updated in place on every poll
+    state: HttpcontrolState
+    values: HttpcontrolState
 
 
 class HttpcontrolCoordinator(DataUpdateCoordinator[HttpcontrolData]):
@@ -36,18 +97,68 @@ class HttpcontrolCoordinator(DataUpdateCoordinator[HttpcontrolData]):
     labels: dict
     rtimes: dict
     measure_unit: str | None
+    client: HttpcontrolClient
+    decoders: dict[str, Callable]
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         self.entry = entry
+        self.decoders = {}
+        self.device_classes: dict[str, str | None] = {}
+        self._changed: set[str] | None = None
+        self.client = HttpcontrolClient(
+            entry.data[CONF_HOST],
+            entry.data[CONF_USERNAME],
+            entry.data[CONF_PASSWORD],
+            entry.options.get(CONF_HEDGE, False),
+        )
+        self.stats = self.client.stats
+        self.profiler: HttpcontrolProfiler | None = None
+        self._device_info: DeviceInfo | None = None
+        self.fleet = None
+        self.fleet_row: int | None = None
+        if entry.options.get(CONF_TRACE, False):
+            self.client.recorder = HttpcontrolTraceRecorder(trace_path(hass, entry), {
+                "model": entry.data[CONF_MODEL],
+                "hw_version": entry.data[ATTR_HW_VERSION],
+                "sw_version": entry.data[ATTR_SW_VERSION],
+                "mac": entry.data[CONF_MAC],
+                "scan_interval": entry.data[CONF_SCAN_INTERVAL],
+            })
         self.labels = {}
         self.rtimes = {}
         self.measure_unit = None
+        self.adaptive = entry.options.get(CONF_ADAPTIVE, False)
+        self.min_interval = timedelta(seconds=entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL))
+        self.max_interval = timedelta(seconds=entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL))
+        self._boost_polls = 0
+        self._pending_outs: dict[str, int] = {}
+        self._pending_rollback: dict[str, Any] = {}
+        self._pending_future: asyncio.Future | None = None
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self.poll_interval = timedelta(seconds=entry.data[CONF_SCAN_INTERVAL])
+        if self.adaptive:
+            self.poll_interval = min(max(self.poll_interval, self.min_interval), self.max_interval)
+        self.scheduler = None
+        self._store = Store(hass, STORAGE_VERSION, storage_key(entry))
+        self._cache_saved_at: float | None = None
+        self._cache_stale = False
+        self._uptime_keys = UPTIME_KEYS[entry.data[CONF_MODEL]]
+        self._skip_keys = SKIP_KEYS.difference(self._uptime_keys)
+        self._uptime: int | None = None
+        self._metadata_fetched_at = 0.0
+        self._metadata_stale = False
+        self._metadata_task: asyncio.Task | None = None
+        self.available_keys: frozenset = frozenset()
+        self._subscribed: frozenset | None = None
+        self._keys_polled_at: float | None = None
+        # refreshes are driven by the shared HttpcontrolScheduler
         super().__init__(
             hass,
             LOGGER,
             name=f"{DOMAIN}_{entry.data[CONF_MAC]}",
-            update_interval=timedelta(seconds=entry.data[CONF_SCAN_INTERVAL]),
-            always_update=False,
+            update_interval=None,
+            # data is updated in place, async_update_listeners skips unchanged entities
+            always_update=True,
         )
 
     def is_1x(self) -> bool:
@@ -62,96 +173,443 @@ class HttpcontrolCoordinator(DataUpdateCoordinator[HttpcontrolData]):
     def unique_id(self, key) -> str:
         return f"{self.entry.data[CONF_MAC]}_{key}"
 
+    @property
+    def device_info(self) -> DeviceInfo:
+        # one instance shared by all entities of the device
+        if self._device_info is None:
+            self._device_info = DeviceInfo(
+                identifiers={(DOMAIN, self.entry.data[CONF_MAC])},
+                manufacturer="tinycontrol",
+                model=self.entry.data[CONF_MODEL],
+                hw_version=self.entry.data[ATTR_HW_VERSION],
+                sw_version=self.entry.data[ATTR_SW_VERSION],
+            )
+        return self._device_info
+
     async def _async_setup(self) -> None:
+        await self._async_fetch_metadata()
+
+    async def _async_fetch_metadata(self) -> None:
+        data = await self._async_get("json/status.json" if self.is_3x() else "st2.xml", priority=PRIORITY_METADATA)
+        # parsed into locals first, a partial response keeps the previous metadata
+        labels = {}
+        rtimes = {}
+        measure_unit = self.measure_unit
         if self.is_3x():
-            data = await self._async_get("json/status.json")
             tnames = data["tname"].split("*")
-            self.labels["dthHum"] = tnames.pop()
-            self.labels["dthTemp"] = tnames.pop()
+            labels["dthHum"] = tnames.pop()
+            labels["dthTemp"] = tnames.pop()
             for i, v in enumerate(tnames):
-                self.labels[f"ds{i+1}"] = v
-            self.labels["bm280p"] = data.get("pressureName")
+                labels[f"ds{i+1}"] = v
+            labels["bm280p"] = data.get("pressureName")
             for i in range(0, 6):
-                self.labels[f"out{i}"] = data.get(f"oname{i}")
+                labels[f"out{i}"] = data.get(f"oname{i}")
             for i in range(0, 6):
-                self.labels[f"inpp{i}"] = data.get(f"iname{i}")
+                labels[f"inpp{i}"] = data.get(f"iname{i}")
             for i in range(0, 4):
-                self.labels[f"pwmd{i}"] = data.get(f"pname{i}")
+                labels[f"pwmd{i}"] = data.get(f"pname{i}")
             for i in range(0, 4):
-                self.labels[f"ind{i}"] = data.get(f"idname{i}")
+                labels[f"ind{i}"] = data.get(f"idname{i}")
             for i in range(0, 4):
-                self.labels[f"power{i}"] = data.get(f"pown{i}")
+                labels[f"power{i}"] = data.get(f"pown{i}")
             for i in enumerate([1, 25, 4, 10]):
-                self.labels[f"pm{i}"] = data.get(f"pm{i}name")
-            self.labels["co2"] = data.get("co2name")
+                labels[f"pm{i}"] = data.get(f"pm{i}name")
+            labels["co2"] = data.get("co2name")
         elif self.is_2x():
-            data = await self._async_get("st2.xml")
-            self.measure_unit = data["mm"]
+            measure_unit = data["mm"]
             names = data["d"].split("*")
             for i in range(0, 6):
-                self.labels[f"ia{i+7}"] = names[i]
+                labels[f"ia{i+7}"] = names[i]
             for i in range(6, 10):
-                self.labels[f"di{i-6}"] = names[i]
+                labels[f"di{i-6}"] = names[i]
 
             for i in range(6, 12):
-                self.labels[f"out{i-6}"] = data[f"r{i}"]
+                labels[f"out{i-6}"] = data[f"r{i}"]
             for i in range(0, 6):
                 if (rtime := data[f"r{i}"]) != "0":
-                    self.rtimes[f"out{i}"] = int(rtime)
+                    rtimes[f"out{i}"] = int(rtime)
         else:
-            data = await self._async_get("st2.xml")
-            self.measure_unit = data["mm"]
+            measure_unit = data["mm"]
             names = data["d"].split("*")
             for i in range(0, 6):
-                self.labels[f"ia{i+7}"] = names[i]
+                labels[f"ia{i+7}"] = names[i]
             for i in range(6, 10):
-                self.labels[f"di{i-6}"] = names[i]
+                labels[f"di{i-6}"] = names[i]
 
             for i in range(5, 10):
-                self.labels[f"out{i-5}"] = data[f"r{i}"]
+                labels[f"out{i-5}"] = data[f"r{i}"]
             for i in range(0, 5):
                 if (rtime := data.get(f"r{i}", "0")) != "0":
-                    self.rtimes[f"out{i}"] = int(rtime)
+                    rtimes[f"out{i}"] = int(rtime)
+        if (labels, rtimes, measure_unit) != (self.labels, self.rtimes, self.measure_unit):
+            self._cache_stale = True
+        self.labels = labels
+        self.rtimes = rtimes
+        self.measure_unit = measure_unit
+        self._metadata_fetched_at = monotonic()
+        self._metadata_stale = False
+        if self.data is not None:
+            self._async_save_cache()
 
-    async def _async_update_data(self) -> HttpcontrolData:
+    async def _async_refresh_metadata(self) -> None:
+        previous = (self.labels, self.rtimes, self.measure_unit)
         try:
-            path = "json/status_per.json" if self.is_3x() else "st0.xml"
-            state = await self._async_get(path)
-            for key in SKIP_KEYS:
-                if key in state:
-                    del state[key]
-
-            if self.is_3x() and "ind" in state:
-                ind = int(state["ind"])
-                state["ind0"] = ind & 0b0001
-                state["ind1"] = ind & 0b0010
-                state["ind2"] = ind & 0b0100
-                state["ind3"] = ind & 0b1000
-                del state["ind"]
-
-            return HttpcontrolData(
-                model=self.entry.data[CONF_MODEL],
-                hw_version=self.entry.data[ATTR_HW_VERSION],
-                sw_version=self.entry.data[ATTR_SW_VERSION],
-                mac=self.entry.data[CONF_MAC],
-                state=state,
+            await self._async_fetch_metadata()
+        except Exception as exc:
+            LOGGER.debug("Failed to refresh metadata of %s: %s", self.name, exc)
+            return
+        if self.data is not None and (self.labels, self.rtimes, self.measure_unit) != previous:
+            self._changed = None
+            self.async_update_listeners()
+
+    def _track_uptime(self, state: dict) -> None:
+        uptime = 0
+        for key, weight in zip(self._uptime_keys, UPTIME_WEIGHTS):
+            try:
+                uptime += int(state.pop(key)) * weight
+            except (KeyError, TypeError, ValueError):
+                pass
+        if self._uptime is not None and uptime < self._uptime:
+            LOGGER.debug("%s rebooted, refreshing metadata", self.name)
+            self._metadata_stale = True
+        self._uptime = uptime
+
+        if self._metadata_task is None and (
+            self._metadata_stale or monotonic() - self._metadata_fetched_at > METADATA_REFRESH_INTERVAL
+        ):
+            self._metadata_task = self.entry.async_create_background_task(
+                self.hass,
+                self._async_refresh_metadata(),
+                f"{self.name} metadata",
             )
+            self._metadata_task.add_done_callback(self._metadata_task_done)
+
+    @callback
+    def _metadata_task_done(self, _task) -> None:
+        self._metadata_task = None
+
+    async def async_load_cache(self) -> bool:
+        if not (cache := await self._store.async_load()):
+            return False
+        self.labels = cache["labels"]
+        self.rtimes = cache["rtimes"]
+        self.measure_unit = cache["measure_unit"]
+        self.available_keys = frozenset(cache.get("available_keys", cache["state"]))
+        self.data = self._make_data(cache["state"])
+        return True
+
+    async def async_refresh_from_cache(self) -> None:
+        self._metadata_task = asyncio.current_task()
+        try:
+            await asyncio.gather(self._async_refresh_metadata(), self.async_refresh())
+        finally:
+            self._metadata_task = None
+
+    @callback
+    def _async_save_cache(self) -> None:
+        # async_delay_save restarts its timer on every call, called on every
+        # poll with a delay it would never write
+        now = monotonic()
+        if not self._cache_stale and self._cache_saved_at is not None and now - self._cache_saved_at < CACHE_SAVE_DELAY:
+            return
+        self._cache_saved_at = now
+        self._cache_stale = False
+        self._store.async_delay_save(self._cache_data)
+
+    @callback
+    def _cache_data(self) -> dict:
+        return {
+            "labels": self.labels,
+            "rtimes": self.rtimes,
+            "measure_unit": self.measure_unit,
+            "state": dict(self.data.state) if self.data is not None else {},
+            "available_keys": sorted(self.available_keys),
+        }
+
+    async def _async_update_data(self) -> HttpcontrolData:
+        try:
+            try:
+                state = await self._async_get_state()
+            except HttpcontrolRequestDropped:
+                # a command response already refreshed the outputs
+                self._changed = set()
+                return self.data
+
+            with profile_stage(self.profiler, STAGE_POSTPROCESS):
+                self._split_ind(state)
+
+                self._track_uptime(state)
+                changed = self._diff(state)
+                values = self._decode(state, changed)
+                if self.adaptive:
+                    self._adapt_interval(changed, values)
+                self._changed = changed
+
+            self._async_save_cache()
+            if self.data is None:
+                return self._make_data(state, values)
+            self.data.state.replace(state)
+            self._update_values(values, changed)
+            return self.data
         except Exception as exc:
+            self._changed = None
             raise UpdateFailed(exc) from exc
 
-    async def async_set_out(self, key: str, state: int):
-        resp = await self._async_get(f"outs.cgi?{key}={state}")
-        out = resp if isinstance(resp, str) else resp["out"]
-        for i, c in enumerate(out):
-            self.data.state[f"out{i}"] = c
-        self.async_set_updated_data(self.data)
-
-    async def _async_get(self, path: str):
-        return await async_get(
-            path,
-            self.entry.data[CONF_HOST],
-            self.entry.data[CONF_USERNAME],
-            self.entry.data[CONF_PASSWORD],
-            async_get_clientsession(self.hass),
+    def _split_ind(self, state: dict) -> None:
+        if self.is_3x() and "ind" in state:
+            ind = int(state.pop("ind"))
+            for i, key in enumerate(IND_KEYS):
+                state[key] = ind & (1 << i)
+
+    async def async_handle_webhook(self, payload: dict) -> None:
+        # "ind" is the 3.x input bitmask, older boards report inputs as separate keys
+        updates = {
+            key: value for key, value in payload.items()
+            if key in self.data.state or (key == "ind" and self.is_3x())
+        }
+        if not updates:
+            await self.async_request_refresh()
+            return
+        try:
+            self._split_ind(updates)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid ind value {payload['ind']!r}") from exc
+        if self.adaptive:
+            self._boost()
+        self._async_apply_state(updates)
+
+    def _make_data(self, state: dict, values: dict | None = None) -> HttpcontrolData:
+        layout = state_layout(self.entry.data[CONF_MODEL])
+        return HttpcontrolData(
+            model=self.entry.data[CONF_MODEL],
+            hw_version=self.entry.data[ATTR_HW_VERSION],
+            sw_version=self.entry.data[ATTR_SW_VERSION],
+            mac=self.entry.data[CONF_MAC],
+            state=HttpcontrolState(layout, state),
+            values=HttpcontrolState(layout, self._decode(state) if values is None else values),
         )
 
+    def _update_values(self, values: dict, changed: set[str] | None) -> None:
+        target = self.data.values
+        if changed is None:
+            target.replace(values)
+            return
+        for key in changed:
+            if key in values:
+                target[key] = values[key]
+            else:
+                target.pop(key, None)
+
+    async def _async_get_state(self) -> dict:
+        path = STATUS_PATHS[self.entry.data[CONF_MODEL]]
+        # only keys of enabled entities are kept, a periodic full poll finds
+        # the keys the board reports for entities that are not set up yet
+        include = self.subscribed_keys()
+        full = (
+            include is None
+            or self._keys_polled_at is None
+            or monotonic() - self._keys_polled_at > METADATA_REFRESH_INTERVAL
+        )
+        state = await self._async_get(path, self._skip_keys, None if full else include)
+        if full:
+            self._keys_polled_at = monotonic()
+            keys = set(state)
+            if "ind" in keys:
+                keys.remove("ind")
+                keys.update(IND_KEYS)
+            if keys != self.available_keys:
+                self.available_keys = frozenset(keys)
+                self._cache_stale = True
+            if include is not None:
+                state = { key: value for key, value in state.items() if key in include }
+        return state
+
+    def subscribed_keys(self) -> frozenset | None:
+        if not self._listeners:
+            return None
+        if self._subscribed is None:
+            keys = set(self._uptime_keys)
+            for context in self.async_contexts():
+                keys.update(context)
+            if not keys.isdisjoint(IND_KEYS):
+                keys.add("ind")
+            self._subscribed = frozenset(keys)
+        return self._subscribed
+
+    @callback
+    def async_add_listener(self, update_callback, context=None):
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._subscribed = None
+
+        @callback
+        def _remove_listener() -> None:
+            remove_listener()
+            self._subscribed = None
+
+        return _remove_listener
+
+    async def async_set_out(self, key: str, state: int, optimistic: dict | None = None):
+        if optimistic is None:
+            optimistic = {key: str(state)} if key in self.data.state else {}
+        rollback = {k: self.data.state.get(k) for k in optimistic}
+        # "out" toggles the reverse-output flag, which flips every switch
+        self._async_apply_state(optimistic, notify_all=key == "out")
+        if self.adaptive:
+            self._boost()
+
+        if key == "out":
+            await self._async_flush_outs()
+            await self._async_send_outs({key: state}, rollback)
+            return
+
+        for k, v in rollback.items():
+            self._pending_rollback.setdefault(k, v)
+        self._pending_outs[key] = state
+        if self._pending_future is None:
+            self._pending_future = self.hass.loop.create_future()
+            self._flush_timer = self.hass.loop.call_later(COMMAND_COALESCE_WINDOW, self._async_flush_later)
+        await asyncio.shield(self._pending_future)
+
+    @callback
+    def _async_flush_later(self) -> None:
+        self.hass.async_create_task(self._async_flush_outs())
+
+    async def _async_flush_outs(self) -> None:
+        if (future := self._pending_future) is None:
+            return
+        self._flush_timer.cancel()
+        outs, rollback = self._pending_outs, self._pending_rollback
+        self._pending_future, self._pending_outs, self._pending_rollback = None, {}, {}
+        try:
+            await self._async_send_outs(outs, rollback)
+        except HomeAssistantError as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(None)
+
+    async def _async_send_outs(self, outs: dict, rollback: dict) -> None:
+        query = "&".join(f"{key}={state}" for key, state in outs.items())
+        try:
+            # the response carries every output, polls queued behind it are dropped
+            resp = await self._async_get(f"outs.cgi?{query}", priority=PRIORITY_COMMAND, supersede_polls=True)
+        except Exception as exc:
+            self._async_apply_state(rollback, notify_all="out" in outs)
+            raise HomeAssistantError(f"Failed to set {query} on {self.entry.data[CONF_HOST]}: {exc}") from exc
+        out = resp if isinstance(resp, str) else resp["out"]
+        self._async_apply_state({f"out{i}": c for i, c in enumerate(out)}, notify_all="out" in outs)
+
+    @callback
+    def _async_apply_state(self, updates: dict, notify_all: bool = False) -> None:
+        state = self.data.state
+        changed = set()
+        for key, value in updates.items():
+            if state.get(key) == value:
+                continue
+            if value is None:
+                state.pop(key, None)
+            else:
+                state[key] = value
+            changed.add(key)
+        if not changed and not notify_all:
+            return
+        self._update_values(self._decode(state, changed), changed)
+        self._changed = changed if self.last_update_success and not notify_all else None
+        # not async_set_updated_data, a local write says nothing about device health
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        with profile_stage(self.profiler, STAGE_LISTENERS):
+            changed, self._changed = self._changed, None
+            if self.fleet is not None:
+                self.fleet.async_update(self, changed)
+            if changed is None:
+                super().async_update_listeners()
+                return
+            for update_callback, context in list(self._listeners.values()):
+                if context is None or not changed.isdisjoint(context):
+                    update_callback()
+
+    async def async_profile(self, duration: float, polls: int | None = None) -> HttpcontrolProfiler:
+        if self.profiler is not None:
+            raise HomeAssistantError(f"{self.name} is already being profiled")
+        profiler = self.profiler = self.client.profiler = HttpcontrolProfiler(polls)
+        try:
+            await asyncio.wait_for(profiler.done.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.profiler = self.client.profiler = None
+        return profiler
+
+    def _diff(self, state: dict) -> set[str] | None:
+        if self.data is None or not self.last_update_success:
+            return None
+        previous = self.data.state
+        changed = { key for key, value in state.items() if previous.get(key) != value }
+        changed.update(key for key in previous if key not in state)
+        return changed
+
+    def _adapt_interval(self, changed: set[str] | None, values: dict) -> None:
+        if changed and any(self._is_activity(key, values.get(key)) for key in changed):
+            self._boost()
+        elif self._boost_polls:
+            self._boost_polls -= 1
+        else:
+            self.poll_interval = min(self.poll_interval * ADAPTIVE_BACKOFF, self.max_interval)
+
+    def _is_activity(self, key: str, value) -> bool:
+        if key.startswith(SWITCHING_PREFIXES):
+            return True
+        previous = self.data.values.get(key)
+        if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            return value != previous
+        return abs(value - previous) > abs(previous) * ADAPTIVE_ANALOG_THRESHOLD
+
+    def _boost(self) -> None:
+        self._boost_polls = ADAPTIVE_BOOST_POLLS
+        if self.poll_interval != self.min_interval:
+            self.poll_interval = self.min_interval
+            if self.scheduler is not None:
+                self.scheduler.async_schedule(self)
+
+    @callback
+    def async_add_decoders(self, descriptions) -> None:
+        keys = set()
+        for description in descriptions:
+            self.decoders[description.key] = description.value_fn
+            self.device_classes[description.key] = description.device_class
+            keys.add(description.key)
+        if self.data is not None:
+            self.data.values.update(self._decode(self.data.state, keys))
+        if self.fleet is not None:
+            self.fleet.async_update(self, None)
+
+    def _decode(self, state: Mapping, keys: set[str] | None = None) -> dict:
+        # only changed keys are decoded, the rest keep their previous values
+        values = {}
+        decoders = self.decoders
+        for key in decoders if keys is None else decoders.keys() & keys:
+            if (raw := state.get(key)) is None:
+                continue
+            try:
+                values[key] = decoders[key](raw)
+            except (TypeError, ValueError):
+                LOGGER.debug("Cannot decode %s=%r", key, raw)
+                values[key] = None
+        return values
+
+    async def _async_get(
+        self,
+        path: str,
+        skip: frozenset = frozenset(),
+        include: frozenset | None = None,
+        priority: int = PRIORITY_POLL,
+        supersede_polls: bool = False,
+    ):
+        return await self.client.async_get(path, skip, include, priority, supersede_polls)
+
+    async def async_close(self) -> None:
+        await self._async_flush_outs()
+        await self.client.async_close()
+
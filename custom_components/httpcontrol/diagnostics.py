@@ -0,0 +1,40 @@
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_FLEET, DATA_SCHEDULER
+from .coordinator import HttpcontrolCoordinator
+from .fleet import is_fleet_entry
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_WEBHOOK_ID}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    if is_fleet_entry(entry):
+        return {"fleet": hass.data[DOMAIN][DATA_FLEET].as_dict()}
+    coordinator: HttpcontrolCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "poll_interval": coordinator.poll_interval.total_seconds(),
+            "state": dict(coordinator.data.state) if coordinator.data is not None else None,
+            "labels": coordinator.labels,
+            "available_keys": sorted(coordinator.available_keys),
+            "subscribed_keys": sorted(coordinator.subscribed_keys() or ()),
+        },
+        "requests": {
+            "circuit_breaker": client.breaker.as_dict(),
+            "timeout": client.rtt.timeout,
+            "hedge_delay": client.rtt.hedge_delay,
+            **coordinator.stats.as_dict(),
+        },
+        "scheduler": hass.data[DOMAIN][DATA_SCHEDULER].stats,
+    }
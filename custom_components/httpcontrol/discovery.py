@@ -0,0 +1,117 @@
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass
+from ipaddress import ip_network
+from time import monotonic
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.device_registry import format_mac
+
+from .const import DOMAIN, DATA_PROBE_CACHE, LOGGER
+from .requests import async_get, HttpcontrolAuthError
+
+PROBE_CACHE_TTL = 300
+SCAN_CONCURRENCY = 32
+SCAN_TIMEOUT = 2
+SCAN_MAX_HOSTS = 1024
+
+class HttpcontrolProbeError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class HttpcontrolProbe:
+    model: str
+    mac: str
+    name: str
+    hw_version: str
+    sw_version: str
+
+
+async def async_probe_cached(hass: HomeAssistant, host: str, username: str, password: str) -> HttpcontrolProbe:
+    cache = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_PROBE_CACHE, {})
+    key = (host, username, password)
+    if (cached := cache.get(key)) is not None and monotonic() - cached[0] < PROBE_CACHE_TTL:
+        return cached[1]
+    probe = await async_probe(async_get_clientsession(hass), host, username, password)
+    cache[key] = (monotonic(), probe)
+    return probe
+
+
+async def async_probe(session: ClientSession, host: str, username: str, password: str) -> HttpcontrolProbe:
+    tasks = [
+        asyncio.create_task(_async_probe_3x(session, host, username, password)),
+        asyncio.create_task(_async_probe_legacy(session, host, username, password)),
+    ]
+    error = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except HttpcontrolAuthError:
+                raise
+            except Exception as exc:
+                error = exc
+    finally:
+        for task in tasks:
+            task.cancel()
+    raise HttpcontrolProbeError(f"No tinycontrol board found at {host}") from error
+
+
+async def _async_probe_3x(session: ClientSession, host: str, username: str, password: str) -> HttpcontrolProbe:
+    all = await async_get("json/all.json", host, username, password, session)
+    network = await async_get("json/network.json", host, username, password, session)
+    return HttpcontrolProbe(
+        model="3.x",
+        mac=format_mac(all["mac"]),
+        name=network["sname"],
+        hw_version=all["hw"],
+        sw_version=all["sw"],
+    )
+
+
+async def _async_probe_legacy(session: ClientSession, host: str, username: str, password: str) -> HttpcontrolProbe:
+    board = await async_get("board.xml", host, username, password, session)
+    st2 = await async_get("st2.xml", host, username, password, session)
+    model = "1.x" if "ser" in st2 else "2.x"
+    return HttpcontrolProbe(
+        model=model,
+        mac=format_mac(board["b6"]),
+        name=board["b7"],
+        hw_version=model[0] + "." + st2["hw"],
+        sw_version=st2["ver"],
+    )
+
+
+def network_hosts(network: str) -> list[str]:
+    hosts = list(ip_network(network, strict=False).hosts())
+    if len(hosts) > SCAN_MAX_HOSTS:
+        raise ValueError(f"{network} has more than {SCAN_MAX_HOSTS} hosts")
+    return [str(host) for host in hosts]
+
+
+async def async_scan(
+    session: ClientSession,
+    hosts: Iterable[str],
+    username: str,
+    password: str,
+    concurrency: int = SCAN_CONCURRENCY,
+    timeout: float = SCAN_TIMEOUT,
+) -> dict[str, HttpcontrolProbe]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _async_scan_host(host: str) -> HttpcontrolProbe | None:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(async_probe(session, host, username, password), timeout)
+            except HttpcontrolAuthError:
+                LOGGER.warning("Found a tinycontrol board at %s, but the credentials were rejected", host)
+            except (HttpcontrolProbeError, asyncio.TimeoutError):
+                pass
+            return None
+
+    hosts = list(hosts)
+    probes = await asyncio.gather(*(_async_scan_host(host) for host in hosts))
+    return { host: probe for host, probe in zip(hosts, probes) if probe is not None }
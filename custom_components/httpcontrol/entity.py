@@ -1,22 +1,15 @@
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.const import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
 from .coordinator import HttpcontrolCoordinator
 
 class HttpcontrolEntity(CoordinatorEntity[HttpcontrolCoordinator]):
     _attr_has_entity_name = True
 
-    def __init__(self, coordinator: HttpcontrolCoordinator, description):
-        super().__init__(coordinator)
+    def __init__(self, coordinator: HttpcontrolCoordinator, description, keys=()):
+        super().__init__(coordinator, context=frozenset((description.key, *keys)))
         self.entity_description = description
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, coordinator.data.mac)},
-            manufacturer="tinycontrol",
-            model=coordinator.data.model,
-            hw_version=coordinator.data.hw_version,
-            sw_version=coordinator.data.sw_version,
-        )
+        self._attr_device_info = coordinator.device_info
         self._attr_unique_id = coordinator.unique_id(description.key)
 
     @property
@@ -24,4 +17,6 @@ class HttpcontrolEntity(CoordinatorEntity[HttpcontrolCoordinator]):
         attrs = {}
         if name := self.coordinator.labels.get(self.entity_description.key):
             attrs["Name"] = name
+        if self.entity_description.entity_category == EntityCategory.DIAGNOSTIC:
+            attrs["Circuit breaker"] = self.coordinator.client.breaker.state
         return attrs
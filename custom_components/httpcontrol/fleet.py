@@ -0,0 +1,214 @@
+from array import array
+from collections import defaultdict
+from collections.abc import Callable
+from fnmatch import fnmatchcase
+from itertools import chain
+from math import fsum, nan
+from operator import itemgetter
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import FLEET_UNIQUE_ID
+
+STAT_MIN = "min"
+STAT_MAX = "max"
+STAT_MEAN = "mean"
+STAT_SUM = "sum"
+STAT_COUNT = "count"
+STAT_COUNT_ON = "count_on"
+STATS = (STAT_MIN, STAT_MAX, STAT_MEAN, STAT_SUM, STAT_COUNT, STAT_COUNT_ON)
+
+GROUP_BY_MODEL = "model"
+GROUP_BY_DEVICE = "device"
+GROUP_BY_KEY = "key"
+GROUP_BY = (GROUP_BY_MODEL, GROUP_BY_DEVICE, GROUP_BY_KEY)
+
+# aggregate listeners are notified at most this often [s]
+FLEET_UPDATE_DELAY = 1
+# distinct queries remembered between invalidations
+SELECTION_CACHE_SIZE = 32
+
+
+def is_fleet_entry(entry: ConfigEntry) -> bool:
+    return entry.unique_id == FLEET_UNIQUE_ID
+
+
+def _row_getter(rows: list[int]) -> Callable[[array], tuple]:
+    if len(rows) == 1:
+        row = rows[0]
+        return lambda column: (column[row],)
+    return itemgetter(*rows)
+
+
+class HttpcontrolFleet:
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._rows: list = []
+        self._free: list[int] = []
+        # one float column per key, a row per device, NaN where a device has no value
+        self._columns: dict[str, array] = {}
+        # matching columns and rows per query, dropped whenever a device, a column,
+        # metadata or the presence of a value changes
+        self._selections: dict[tuple, dict] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+        self._unsub_notify: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_add(self, coordinator) -> None:
+        if self._free:
+            row = self._free.pop()
+            self._rows[row] = coordinator
+        else:
+            row = len(self._rows)
+            self._rows.append(coordinator)
+            for column in self._columns.values():
+                column.append(nan)
+        coordinator.fleet, coordinator.fleet_row = self, row
+        self.async_update(coordinator, None)
+
+    @callback
+    def async_remove(self, coordinator) -> None:
+        row = coordinator.fleet_row
+        for column in self._columns.values():
+            column[row] = nan
+        self._rows[row] = None
+        self._free.append(row)
+        self._selections.clear()
+        coordinator.fleet = coordinator.fleet_row = None
+        self._async_schedule_notify()
+
+    @callback
+    def async_update(self, coordinator, changed: set[str] | None) -> None:
+        if changed is None:
+            # availability, labels or decoders may have changed as well
+            self._selections.clear()
+        if coordinator.data is None:
+            return
+        values = coordinator.data.values
+        row = coordinator.fleet_row
+        if changed is None:
+            for column in self._columns.values():
+                column[row] = nan
+        for key in values if changed is None else changed:
+            value = values.get(key)
+            numeric = isinstance(value, (int, float))
+            if (column := self._columns.get(key)) is None:
+                if not numeric:
+                    continue
+                column = self._columns[key] = array("d", [nan]) * len(self._rows)
+                self._selections.clear()
+            previous = column[row]
+            column[row] = value = float(value) if numeric else nan
+            if (previous != previous) != (value != value):
+                self._selections.clear()
+        self._async_schedule_notify()
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_schedule_notify(self) -> None:
+        if self._listeners and self._unsub_notify is None:
+            self._unsub_notify = async_call_later(self.hass, FLEET_UPDATE_DELAY, self._async_notify)
+
+    @callback
+    def _async_notify(self, _now) -> None:
+        self._unsub_notify = None
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def as_dict(self) -> dict:
+        return {
+            "devices": len(self._rows) - len(self._free),
+            "rows": len(self._rows),
+            "columns": sorted(self._columns),
+            "cached_queries": len(self._selections),
+        }
+
+    def query(
+        self,
+        stat: str,
+        keys: str = "*",
+        model: str | None = None,
+        label: str | None = None,
+        device_class: str | None = None,
+        group_by: str | None = None,
+    ) -> dict:
+        selection = self._select(keys, model, label, device_class, group_by)
+        if group_by is None:
+            return self._reduce(stat, selection.get(None, ()))
+        return { group: self._reduce(stat, cells) for group, cells in sorted(selection.items()) }
+
+    def _select(
+        self,
+        keys: str,
+        model: str | None,
+        label: str | None,
+        device_class: str | None,
+        group_by: str | None,
+    ) -> dict:
+        cache_key = (keys, model, label, device_class, group_by)
+        if (selection := self._selections.get(cache_key)) is not None:
+            return selection
+
+        if len(self._selections) >= SELECTION_CACHE_SIZE:
+            self._selections.clear()
+        patterns = [pattern.strip() for pattern in keys.split(",") if pattern.strip()]
+        rows = [
+            (row, coordinator)
+            for row, coordinator in enumerate(self._rows)
+            if coordinator is not None
+            and coordinator.last_update_success
+            and (model is None or coordinator.data.model == model)
+        ]
+        groups = defaultdict(lambda: defaultdict(list))
+        for key, column in self._columns.items():
+            if not any(fnmatchcase(key, pattern) for pattern in patterns):
+                continue
+            for row, coordinator in rows:
+                if column[row] != column[row]:
+                    continue
+                if device_class is not None and coordinator.device_classes.get(key) != device_class:
+                    continue
+                if label is not None and not fnmatchcase(coordinator.labels.get(key) or "", label):
+                    continue
+                if group_by == GROUP_BY_MODEL:
+                    group = coordinator.data.model
+                elif group_by == GROUP_BY_DEVICE:
+                    group = coordinator.entry.title
+                elif group_by == GROUP_BY_KEY:
+                    group = key
+                else:
+                    group = None
+                groups[group][key].append(row)
+
+        selection = self._selections[cache_key] = {
+            group: [(key, self._columns[key], selected, _row_getter(selected)) for key, selected in columns.items()]
+            for group, columns in groups.items()
+        }
+        return selection
+
+    def _reduce(self, stat: str, cells) -> dict:
+        count = sum(len(rows) for _, _, rows, _ in cells)
+        if stat == STAT_COUNT:
+            return {"value": count}
+        if stat == STAT_COUNT_ON:
+            return {"value": count - sum(getter(column).count(0.0) for _, column, _, getter in cells)}
+        if not count:
+            return {"value": None, "count": 0}
+        if stat in (STAT_MIN, STAT_MAX):
+            pick = min if stat == STAT_MIN else max
+            best = None
+            for key, column, rows, getter in cells:
+                values = getter(column)
+                value = pick(values)
+                if best is None or pick(value, best[0]) != best[0]:
+                    best = (value, rows[values.index(value)], key)
+            value, row, key = best
+            return {"value": value, "count": count, "device": self._rows[row].entry.title, "key": key}
+        total = fsum(chain.from_iterable(getter(column) for _, column, _, getter in cells))
+        return {"value": total / count if stat == STAT_MEAN else total, "count": count}
@@ -0,0 +1,30 @@
+from xml.etree.ElementTree import fromstring
+
+from homeassistant.util.json import json_loads
+
+CONTENT_TYPE_XML = "text/xml"
+CONTENT_TYPE_JSON = "application/json"
+
+
+def parse_xml(body: bytes, skip: frozenset = frozenset(), include: frozenset | None = None) -> dict:
+    root = fromstring(body)
+    if include is None:
+        return { item.tag: item.text for item in root if item.tag not in skip }
+    return { item.tag: item.text for item in root if item.tag in include and item.tag not in skip }
+
+
+def parse_json(body: bytes, skip: frozenset = frozenset(), include: frozenset | None = None) -> dict:
+    data = json_loads(body)
+    if not isinstance(data, dict):
+        return data
+    if include is not None:
+        return { key: value for key, value in data.items() if key in include and key not in skip }
+    for key in skip.intersection(data):
+        del data[key]
+    return data
+
+
+PARSERS = {
+    CONTENT_TYPE_XML: parse_xml,
+    CONTENT_TYPE_JSON: parse_json,
+}
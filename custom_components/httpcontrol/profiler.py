@@ -0,0 +1,56 @@
+import asyncio
+import cProfile
+import json
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+from .stats import percentile
+
+STAGE_NETWORK = "network"
+STAGE_PARSE = "parse"
+STAGE_POSTPROCESS = "postprocess"
+STAGE_LISTENERS = "listeners"
+STAGES = (STAGE_NETWORK, STAGE_PARSE, STAGE_POSTPROCESS, STAGE_LISTENERS)
+
+
+class HttpcontrolProfiler:
+    def __init__(self, polls: int | None = None):
+        self.polls = polls
+        self.profile = cProfile.Profile()
+        self.stages: dict[str, list[float]] = { stage: [] for stage in STAGES }
+        self.done = asyncio.Event()
+
+    def add(self, stage: str, elapsed: float) -> None:
+        self.stages[stage].append(elapsed)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = perf_counter()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            self.add(stage, perf_counter() - start)
+            if stage == STAGE_POSTPROCESS and self.polls is not None and len(self.stages[stage]) >= self.polls:
+                self.done.set()
+
+    def breakdown(self) -> dict:
+        return {
+            stage: {
+                "count": len(samples),
+                "total_ms": round(sum(samples) * 1000, 3),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else None,
+                "p95_ms": round(percentile(samples, 95) * 1000, 3) if samples else None,
+            }
+            for stage, samples in self.stages.items()
+        }
+
+    def write(self, stats_path: str, breakdown_path: str) -> None:
+        self.profile.dump_stats(stats_path)
+        with open(breakdown_path, "w", encoding="utf-8") as file:
+            json.dump(self.breakdown(), file, indent=2)
+
+
+def profile_stage(profiler: HttpcontrolProfiler | None, stage: str):
+    return profiler.measure(stage) if profiler is not None else nullcontext()
@@ -1,18 +1,62 @@
-from aiohttp import BasicAuth
-from requests import Session
-from xml.etree import ElementTree
+import asyncio
+from collections import deque
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic, perf_counter
+
+from aiohttp import BasicAuth, ClientConnectionError, ClientSession, ClientTimeout, TCPConnector
+
+from .parser import PARSERS
+from .profiler import HttpcontrolProfiler, STAGE_NETWORK, STAGE_PARSE, profile_stage
+from .stats import ERROR_AUTH, HttpcontrolStats
+from .trace import ERROR_CONNECTION, ERROR_TIMEOUT, HttpcontrolTraceRecorder, HttpcontrolTraceReplay
 
 class HttpcontrolAuthError(Exception):
     pass
 
+class HttpcontrolRequestDropped(Exception):
+    pass
+
+class HttpcontrolUnavailableError(Exception):
+    pass
+
 DEFAULT_TIMEOUT = 3
 
+# lan-kontroler firmware serves a single connection at a time
+CONNECTIONS_PER_HOST = 1
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+
+# requests to a device are serialized, lower value goes first
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+PRIORITY_METADATA = 2
+
+# consecutive failures opening the circuit breaker and its backoff [s]
+BREAKER_THRESHOLD = 3
+BREAKER_BACKOFF = 5
+BREAKER_MAX_BACKOFF = 300
+
+# per-device timeouts derived from observed round trips [s]
+RTT_SAMPLES = 64
+RTT_MIN_SAMPLES = 8
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_FACTOR = 3
+MIN_TIMEOUT = 0.5
+MAX_TIMEOUT = 10
+HEDGE_PERCENTILE = 95
+HEDGE_CONNECTIONS_PER_HOST = 2
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
 async def async_get(
     path: str,
     host: str,
     username: str,
     password: str,
-    session: Session,
+    session: ClientSession,
 ):
     auth = BasicAuth(username, password) if username else None
     async with session.request(
@@ -21,12 +65,245 @@ async def async_get(
         auth=auth,
         timeout=DEFAULT_TIMEOUT
     ) as response:
-        if response.status == 401:
-            raise HttpcontrolAuthError()
-        response.raise_for_status()
-        if response.headers["content-type"] == "text/xml":
-            return { item.tag: item.text for item in ElementTree.fromstring(await response.text()) }
-        elif response.headers["content-type"] == "application/json":
-            return await response.json()
-        else:
-            return await response.text()
+        return await _async_read(response)
+
+async def _async_read(response, skip: frozenset = frozenset(), include: frozenset | None = None):
+    return _parse(response, await response.read(), skip, include)
+
+def _parse(response, body: bytes, skip: frozenset = frozenset(), include: frozenset | None = None):
+    if response.status == 401:
+        raise HttpcontrolAuthError()
+    response.raise_for_status()
+    if parser := PARSERS.get(response.headers["content-type"]):
+        return parser(body, skip, include)
+    return body.decode("utf-8", "replace")
+
+
+class HttpcontrolCircuitBreaker:
+    def __init__(self, host: str):
+        self.host = host
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.backoff = BREAKER_BACKOFF
+        self._retry_at = 0.0
+
+    def check(self, allow_probe: bool, start_probe: bool = True) -> None:
+        if self.state == BREAKER_CLOSED:
+            return
+        if self.state == BREAKER_OPEN and allow_probe and monotonic() >= self._retry_at:
+            if start_probe:
+                self.state = BREAKER_HALF_OPEN
+            return
+        raise HttpcontrolUnavailableError(f"{self.host} is unreachable, next attempt in {self.retry_in:.0f} s")
+
+    def success(self) -> None:
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.backoff = BREAKER_BACKOFF
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN:
+            self.backoff = min(self.backoff * 2, BREAKER_MAX_BACKOFF)
+            self._open()
+        elif self.failures >= BREAKER_THRESHOLD:
+            self._open()
+
+    def abort(self) -> None:
+        if self.state == BREAKER_HALF_OPEN:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = BREAKER_OPEN
+        self._retry_at = monotonic() + self.backoff
+
+    @property
+    def retry_in(self) -> float:
+        return max(0.0, self._retry_at - monotonic())
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in, 1) if self.state != BREAKER_CLOSED else None,
+        }
+
+
+class HttpcontrolRttEstimator:
+    def __init__(self):
+        self._samples = deque(maxlen=RTT_SAMPLES)
+
+    def add(self, rtt: float) -> None:
+        self._samples.append(rtt)
+
+    def add_timeout(self, timeout: float) -> None:
+        # an expired request took at least the timeout, without it as a sample
+        # a device that got slower would keep timing out at the old estimate
+        self._samples.append(timeout)
+
+    def percentile(self, percentile: int) -> float | None:
+        if len(self._samples) < RTT_MIN_SAMPLES:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, len(samples) * percentile // 100)]
+
+    @property
+    def timeout(self) -> float:
+        if (rtt := self.percentile(TIMEOUT_PERCENTILE)) is None:
+            return DEFAULT_TIMEOUT
+        return min(max(rtt * TIMEOUT_FACTOR, MIN_TIMEOUT), MAX_TIMEOUT)
+
+    @property
+    def hedge_delay(self) -> float | None:
+        return self.percentile(HEDGE_PERCENTILE)
+
+
+class HttpcontrolClient:
+    def __init__(self, host: str, username: str, password: str, hedge: bool = False):
+        self._base_url = f"http://{host}/"
+        self.breaker = HttpcontrolCircuitBreaker(host)
+        self.rtt = HttpcontrolRttEstimator()
+        self.stats = HttpcontrolStats()
+        self.hedge = hedge
+        self._headers = {"Authorization": BasicAuth(username, password).encode()} if username else {}
+        self._timeout = ClientTimeout(total=DEFAULT_TIMEOUT)
+        self._session: ClientSession | None = None
+        self._busy = False
+        self._waiting = []
+        self._sequence = count()
+        self.recorder: HttpcontrolTraceRecorder | None = None
+        self.replay: HttpcontrolTraceReplay | None = None
+        self.profiler: HttpcontrolProfiler | None = None
+
+    def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    limit_per_host=HEDGE_CONNECTIONS_PER_HOST if self.hedge else CONNECTIONS_PER_HOST,
+                    keepalive_timeout=KEEPALIVE_TIMEOUT,
+                    use_dns_cache=True,
+                    ttl_dns_cache=DNS_CACHE_TTL,
+                ),
+                headers=self._headers,
+                timeout=self._timeout,
+            )
+        return self._session
+
+    async def async_get(
+        self,
+        path: str,
+        skip: frozenset = frozenset(),
+        include: frozenset | None = None,
+        priority: int = PRIORITY_POLL,
+        supersede_polls: bool = False,
+    ):
+        # fail fast while the device is unreachable, reads double as recovery probes
+        self.breaker.check(priority != PRIORITY_COMMAND, start_probe=False)
+        await self._async_acquire(priority)
+        try:
+            self.breaker.check(priority != PRIORITY_COMMAND)
+            timeout = self.rtt.timeout
+            if timeout != self._timeout.total:
+                self._timeout = ClientTimeout(total=timeout)
+            # outs.cgi is not idempotent, only reads are hedged
+            if self.hedge and priority != PRIORITY_COMMAND and (delay := self.rtt.hedge_delay) is not None:
+                return await self._async_hedged_fetch(path, skip, include, delay)
+            result = await self._async_fetch(path, skip, include)
+            if supersede_polls:
+                # before the slot is released, a queued poll would otherwise go next
+                self._drop_polls()
+            return result
+        except HttpcontrolAuthError:
+            self.stats.add_error(path, ERROR_AUTH)
+            raise
+        except (ClientConnectionError, asyncio.TimeoutError) as exc:
+            self.stats.add_error(path, ERROR_TIMEOUT if isinstance(exc, asyncio.TimeoutError) else ERROR_CONNECTION)
+            self.breaker.failure()
+            raise
+        finally:
+            self.breaker.abort()
+            self._release()
+
+    async def _async_fetch(self, path: str, skip: frozenset, include: frozenset | None):
+        start = monotonic()
+        try:
+            if self.replay is not None:
+                response = await self.replay.async_respond(path)
+                return await self._async_handle(response, path, start, skip, include)
+            async with self._get_session().get(self._base_url + path, timeout=self._timeout) as response:
+                return await self._async_handle(response, path, start, skip, include)
+        except (ClientConnectionError, asyncio.TimeoutError) as exc:
+            if isinstance(exc, asyncio.TimeoutError):
+                self.rtt.add_timeout(self._timeout.total)
+            if self.recorder is not None:
+                error = ERROR_TIMEOUT if isinstance(exc, asyncio.TimeoutError) else ERROR_CONNECTION
+                self.recorder.record(path, monotonic() - start, error=error)
+            raise
+
+    async def _async_handle(self, response, path: str, start: float, skip: frozenset, include: frozenset | None):
+        rtt = monotonic() - start
+        self.rtt.add(rtt)
+        self.breaker.success()
+        body = await response.read()
+        if self.profiler is not None:
+            self.profiler.add(STAGE_NETWORK, monotonic() - start)
+        if self.recorder is not None:
+            self.recorder.record(path, rtt, response.status, response.headers, body)
+        parse_start = perf_counter()
+        try:
+            # synchronous, cProfile must not stay enabled across a suspension
+            with profile_stage(self.profiler, STAGE_PARSE):
+                return _parse(response, body, skip, include)
+        finally:
+            self.stats.add_request(path, rtt, len(body), perf_counter() - parse_start)
+
+    async def _async_hedged_fetch(self, path: str, skip: frozenset, include: frozenset | None, delay: float):
+        first = asyncio.create_task(self._async_fetch(path, skip, include))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.add(asyncio.create_task(self._async_fetch(path, skip, include)))
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _drop_polls(self) -> None:
+        for priority, _, waiter in self._waiting:
+            if priority == PRIORITY_POLL and not waiter.done():
+                waiter.set_exception(HttpcontrolRequestDropped())
+
+    async def _async_acquire(self, priority: int) -> None:
+        if not self._busy:
+            self._busy = True
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heappush(self._waiting, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiting:
+            _, _, waiter = heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy = False
+
+    async def async_close(self) -> None:
+        if self.recorder is not None:
+            await self.recorder.async_flush()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from heapq import heapify, heappop, heappush
+from math import floor
+from statistics import quantiles
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import LOGGER
+
+MAX_CONCURRENT_POLLS = 8
+LAG_SAMPLES = 1000
+# removed devices leave gaps, phases are evened out once removals settle [s]
+REBALANCE_DELAY = 10
+
+
+class HttpcontrolScheduler:
+    def __init__(self, hass: HomeAssistant, max_concurrent: int = MAX_CONCURRENT_POLLS):
+        self.hass = hass
+        self.max_concurrent = max_concurrent
+        self.polls = 0
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # phase of every coordinator as a fraction of its poll interval
+        self._phases = {}
+        # (-length, start) of the free stretches between neighbouring phases, None when stale
+        self._gaps: list[tuple[float, float]] | None = []
+        self._timers = {}
+        self._unsub_rebalance: CALLBACK_TYPE | None = None
+        self._lags = deque(maxlen=LAG_SAMPLES)
+
+    @callback
+    def async_add(self, coordinator) -> None:
+        coordinator.scheduler = self
+        self._phases[coordinator] = self._take_phase()
+        self.async_schedule(coordinator)
+
+    @callback
+    def async_remove(self, coordinator) -> None:
+        self._async_cancel(coordinator)
+        del self._phases[coordinator]
+        coordinator.scheduler = None
+        self._gaps = None
+        if self._unsub_rebalance is not None:
+            self._unsub_rebalance()
+            self._unsub_rebalance = None
+        if self._phases:
+            self._unsub_rebalance = async_call_later(self.hass, REBALANCE_DELAY, self._async_rebalance)
+
+    @property
+    def empty(self) -> bool:
+        return not self._phases
+
+    @callback
+    def async_schedule(self, coordinator) -> None:
+        self._async_cancel(coordinator)
+        interval = coordinator.poll_interval.total_seconds()
+        phase = interval * self._phases[coordinator]
+        when = phase + (floor((self.hass.loop.time() - phase) / interval) + 1) * interval
+        self._timers[coordinator] = self.hass.loop.call_at(when, self._async_fire, coordinator, when)
+
+    @property
+    def stats(self) -> dict:
+        lags = sorted(self._lags)
+        stats = {
+            "devices": len(self._phases),
+            "polls": self.polls,
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+        }
+        if len(lags) > 1:
+            percentiles = quantiles(lags, n=100, method="inclusive")
+            stats["lag_p50"] = percentiles[49]
+            stats["lag_p99"] = percentiles[98]
+            stats["lag_max"] = lags[-1]
+        return stats
+
+    def _take_phase(self) -> float:
+        # new devices land in the middle of the largest gap: 0, 1/2, 1/4, 3/4, ...
+        if not self._phases:
+            self._gaps = [(-1.0, 0.0)]
+            return 0.0
+        if self._gaps is None:
+            phases = sorted(self._phases.values())
+            self._gaps = [(start - end, start) for start, end in zip(phases, phases[1:] + [phases[0] + 1])]
+            heapify(self._gaps)
+        length, start = heappop(self._gaps)
+        length /= 2
+        phase = (start - length) % 1
+        heappush(self._gaps, (length, start))
+        heappush(self._gaps, (length, phase))
+        return phase
+
+    @callback
+    def _async_rebalance(self, _now) -> None:
+        self._unsub_rebalance = None
+        count = len(self._phases)
+        for index, coordinator in enumerate(self._phases):
+            self._phases[coordinator] = index / count
+            self.async_schedule(coordinator)
+        self._gaps = [(-1 / count, index / count) for index in range(count)]
+
+    @callback
+    def _async_cancel(self, coordinator) -> None:
+        if (timer := self._timers.pop(coordinator, None)) is not None:
+            timer.cancel()
+
+    @callback
+    def _async_fire(self, coordinator, scheduled: float) -> None:
+        self._timers.pop(coordinator, None)
+        self.hass.async_create_background_task(
+            self._async_poll(coordinator, scheduled),
+            name=f"{coordinator.name} poll",
+        )
+
+    async def _async_poll(self, coordinator, scheduled: float) -> None:
+        async with self._semaphore:
+            lag = self.hass.loop.time() - scheduled
+            self._lags.append(lag)
+            coordinator.stats.add_poll_lag(lag)
+            self.polls += 1
+            self.in_flight += 1
+            try:
+                await coordinator.async_refresh()
+            except Exception:
+                LOGGER.exception("Unexpected error polling %s", coordinator.name)
+            finally:
+                self.in_flight -= 1
+        if coordinator in self._phases and coordinator not in self._timers:
+            self.async_schedule(coordinator)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Callable
+from time import monotonic
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -8,20 +9,36 @@ from homeassistant.const import (
     UnitOfElectricCurrent,
     UnitOfTemperature,
     UnitOfPressure,
+    UnitOfInformation,
+    UnitOfTime,
     EntityCategory,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
     SensorStateClass,
 )
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_MAX_STALENESS,
+    DEFAULT_MAX_STALENESS,
+    DATA_FLEET,
+    FLEET_UNIQUE_ID,
+    FLEET_NAME,
+)
 from .coordinator import HttpcontrolData, HttpcontrolCoordinator
 from .entity import HttpcontrolEntity
+from .fleet import HttpcontrolFleet, is_fleet_entry, STAT_COUNT, STAT_COUNT_ON, STAT_MAX, STAT_MEAN, STAT_MIN
+from .stats import HttpcontrolStats
 
 PARALLEL_UPDATES = 0
 
@@ -32,6 +49,11 @@ class HttpcontrolSensorDescription(SensorEntityDescription):
     state_class: str = SensorStateClass.MEASUREMENT
     value_fn: Callable = lambda x: int(x)
     suggested_display_precision=1
+    analog: bool = True
+    deadband: float | None = None
+    deadband_percent: float | None = None
+    min_interval: int | None = None
+    max_staleness: int | None = None
 
 SENSORS_1x = [
     HttpcontrolSensorDescription(
@@ -41,6 +63,7 @@ SENSORS_1x = [
         entity_registry_enabled_default=True,
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -50,11 +73,13 @@ SENSORS_1x = [
         entity_registry_enabled_default=True,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
         key="ia2",
         name="Inp1",
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -62,6 +87,7 @@ SENSORS_1x = [
         name="Inp3",
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -70,6 +96,7 @@ SENSORS_1x = [
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     *[
@@ -78,6 +105,7 @@ SENSORS_1x = [
             name=f"Inp{i}",
             device_class=SensorDeviceClass.TEMPERATURE,
             native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            deadband=0.1,
             value_fn = lambda x: int(x) / 10.0 if -50 <= int(x) <= 850 else None,
         )
         for i in [2, 6, 7, 8, 9, 10, 11]
@@ -87,6 +115,7 @@ SENSORS_1x = [
         name="Temperature",
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -94,12 +123,15 @@ SENSORS_1x = [
         name="Humidity",
         device_class=SensorDeviceClass.HUMIDITY,
         native_unit_of_measurement=PERCENTAGE,
+        deadband=0.1,
+        min_interval=60,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
         key="ia17",
         name="INP4D measure",
         suggested_display_precision=3,
+        deadband=0.001,
         value_fn = lambda x: int(x) / 1000.0,
     ),
 ]
@@ -112,6 +144,7 @@ SENSORS_2x = [
         entity_registry_enabled_default=True,
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -121,6 +154,7 @@ SENSORS_2x = [
         entity_registry_enabled_default=True,
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -129,6 +163,7 @@ SENSORS_2x = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     HttpcontrolSensorDescription(
@@ -137,6 +172,7 @@ SENSORS_2x = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     HttpcontrolSensorDescription(
@@ -144,6 +180,7 @@ SENSORS_2x = [
         name="Inp3",
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0 if -30 <= int(x) <= 420 else None,
     ),
     HttpcontrolSensorDescription(
@@ -152,6 +189,7 @@ SENSORS_2x = [
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     HttpcontrolSensorDescription(
@@ -159,6 +197,7 @@ SENSORS_2x = [
         name="Inp5",
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     *[
@@ -168,6 +207,7 @@ SENSORS_2x = [
             device_class=SensorDeviceClass.TEMPERATURE,
             native_unit_of_measurement=UnitOfTemperature.CELSIUS,
             suggested_display_precision=1,
+            deadband=0.1,
             value_fn=lambda x: int(x) / 10.0 if x != "-600" else None,
         )
         for i in range(7, 13)
@@ -177,6 +217,7 @@ SENSORS_2x = [
         name="Temperature",
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
@@ -184,12 +225,15 @@ SENSORS_2x = [
         name="Humidity",
         device_class=SensorDeviceClass.HUMIDITY,
         native_unit_of_measurement=PERCENTAGE,
+        deadband=0.1,
+        min_interval=60,
         value_fn = lambda x: int(x) / 10.0,
     ),
     HttpcontrolSensorDescription(
         key="ia17",
         name="INP4D measure",
         suggested_display_precision=3,
+        deadband=0.001,
         value_fn = lambda x: int(x) / 1000.0,
     ),
 ]
@@ -202,6 +246,7 @@ SENSORS_3x = [
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     HttpcontrolSensorDescription(
@@ -212,6 +257,7 @@ SENSORS_3x = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         suggested_display_precision=2,
+        deadband=0.01,
         value_fn = lambda x: int(x) / 100.0,
     ),
     HttpcontrolSensorDescription(
@@ -219,6 +265,7 @@ SENSORS_3x = [
         name="Temperature",
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=0.1,
         value_fn = lambda x: int(x) / 10.0 if x != "-600" else None,
     ),
     HttpcontrolSensorDescription(
@@ -226,6 +273,8 @@ SENSORS_3x = [
         name="Humidity",
         device_class=SensorDeviceClass.HUMIDITY,
         native_unit_of_measurement=PERCENTAGE,
+        deadband=0.1,
+        min_interval=60,
         value_fn = lambda x: int(x) / 10.0 if x != "-600" else None,
     ),
     HttpcontrolSensorDescription(
@@ -234,6 +283,8 @@ SENSORS_3x = [
         device_class=SensorDeviceClass.PRESSURE,
         native_unit_of_measurement=UnitOfPressure.HPA,
         suggested_display_precision=2,
+        deadband=0.01,
+        min_interval=60,
         value_fn = lambda x: int(x) / 100.0 if x != "-600" else None,
     ),
     *[
@@ -241,6 +292,7 @@ SENSORS_3x = [
             key=f"diff{i}",
             name=f"DIFF{i}",
             suggested_display_precision=3,
+            analog=False,
             value_fn=lambda x: int(x),
         )
         for i in range(1, 4)
@@ -249,6 +301,9 @@ SENSORS_3x = [
         HttpcontrolSensorDescription(
             key=f"ds{i}",
             name=f"DS{i}",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            deadband=0.1,
             value_fn=lambda x: int(x) / 10.0 if x != "-600" else None,
         )
         for i in range(1, 9)
@@ -258,6 +313,7 @@ SENSORS_3x = [
             key=f"inpp{i}",
             name=f"Input {i}",
             state_class=SensorStateClass.TOTAL_INCREASING,
+            analog=False,
             value_fn=lambda x: int(x) / 100.0,
         )
         for i in range(1, 7)
@@ -270,27 +326,253 @@ SENSORS = {
     "3.x": SENSORS_3x,
 }
 
+@dataclass(frozen=True, kw_only=True)
+class HttpcontrolStatsSensorDescription(SensorEntityDescription):
+    entity_category: str = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+    state_class: str = SensorStateClass.MEASUREMENT
+    stats_fn: Callable[[HttpcontrolStats], Any]
+
+STATS_SENSORS = [
+    HttpcontrolStatsSensorDescription(
+        key="stats_latency",
+        name="Request latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        stats_fn=lambda stats: stats.latency_ms,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_parse",
+        name="Parse time p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=2,
+        stats_fn=lambda stats: stats.parse_ms,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_poll_lag",
+        name="Poll lag p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        stats_fn=lambda stats: stats.poll_lag_ms,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_response_size",
+        name="Response size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_display_precision=0,
+        stats_fn=lambda stats: stats.response_size,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_timeouts",
+        name="Timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        stats_fn=lambda stats: stats.timeouts,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_connection_errors",
+        name="Connection errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        stats_fn=lambda stats: stats.connection_errors,
+    ),
+    HttpcontrolStatsSensorDescription(
+        key="stats_auth_failures",
+        name="Authentication failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        stats_fn=lambda stats: stats.auth_failures,
+    ),
+]
+
+@dataclass(frozen=True, kw_only=True)
+class HttpcontrolFleetSensorDescription(SensorEntityDescription):
+    state_class: str = SensorStateClass.MEASUREMENT
+    stat: str
+    keys: str = "*"
+    filter_device_class: str | None = None
+
+FLEET_SENSORS = [
+    *[
+        HttpcontrolFleetSensorDescription(
+            key=f"fleet_{stat}_temperature",
+            name=f"{stat.capitalize()} temperature",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            suggested_display_precision=1,
+            stat=stat,
+            filter_device_class=SensorDeviceClass.TEMPERATURE,
+        )
+        for stat in (STAT_MIN, STAT_MAX, STAT_MEAN)
+    ],
+    HttpcontrolFleetSensorDescription(
+        key="fleet_inputs_on",
+        name="Inputs on",
+        stat=STAT_COUNT_ON,
+        keys="di*,ind*",
+    ),
+    HttpcontrolFleetSensorDescription(
+        key="fleet_values",
+        name="Reported values",
+        stat=STAT_COUNT,
+    ),
+]
+
+FLEET_DEVICE_INFO = DeviceInfo(
+    identifiers={(DOMAIN, FLEET_UNIQUE_ID)},
+    entry_type=DeviceEntryType.SERVICE,
+    manufacturer="tinycontrol",
+    name=FLEET_NAME,
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    if is_fleet_entry(entry):
+        fleet: HttpcontrolFleet = hass.data[DOMAIN][DATA_FLEET]
+        async_add_entities(HttpcontrolFleetSensor(fleet, entity) for entity in FLEET_SENSORS)
+        return
+
     coordinator: HttpcontrolCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.async_add_decoders(SENSORS[coordinator.data.model])
 
     async_add_entities(
         HttpcontrolSensor(coordinator, entity)
         for entity in SENSORS[coordinator.data.model]
-        if entity.key in coordinator.data.state
+        if entity.key in coordinator.available_keys
     )
+    async_add_entities(HttpcontrolStatsSensor(coordinator, entity) for entity in STATS_SENSORS)
 
 class HttpcontrolSensor(HttpcontrolEntity, SensorEntity):
     entity_description: HttpcontrolSensorDescription
 
     def __init__(self, coordinator: HttpcontrolCoordinator, description: HttpcontrolSensorDescription):
         super().__init__(coordinator, description)
-        if "ia17" == description.key:
-            self._attr_native_unit_of_measurement = coordinator.measure_unit
+
+        options = coordinator.entry.options if description.analog else {}
+        self._deadband = _option(description.deadband, options, CONF_DEADBAND, 0)
+        self._deadband_percent = _option(description.deadband_percent, options, CONF_DEADBAND_PERCENT, 0)
+        self._min_interval = _option(description.min_interval, options, CONF_MIN_PUBLISH_INTERVAL, 0)
+        self._max_staleness = _option(description.max_staleness, options, CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+        self._published_value = coordinator.data.values.get(description.key)
+        self._published_at = monotonic()
+        self._published_available = coordinator.last_update_success
+        self._unsub_publish = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_publish)
+
+    @property
+    def native_value(self) -> float | int | None:
+        return self._published_value
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        if "ia17" == self.entity_description.key:
+            return self.coordinator.measure_unit
+        return super().native_unit_of_measurement
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        value = self.coordinator.data.values.get(self.entity_description.key)
+        available = self.available
+        # only a changed value inside the deadband or minimum interval is held back,
+        # availability and attribute changes are always written
+        if available == self._published_available and value != self._published_value:
+            if (delay := self._publish_delay(value)) is not None:
+                if self._unsub_publish is None and delay > 0:
+                    self._unsub_publish = async_call_later(self.hass, delay, self._async_publish_pending)
+                return
+        self._cancel_publish()
+        if value != self._published_value:
+            self._published_value = value
+            self._published_at = monotonic()
+        self._published_available = available
+        super()._handle_coordinator_update()
+
+    def _publish_delay(self, value) -> float | None:
+        published = self._published_value
+        if value is None or published is None:
+            return None
+        elapsed = monotonic() - self._published_at
+        if self._max_staleness and elapsed >= self._max_staleness:
+            return None
+        if elapsed < self._min_interval:
+            return self._min_interval - elapsed
+        # 21.3 - 21.2 > 0.1 in floats, a one LSB step must stay inside a one LSB deadband
+        delta = round(abs(value - published), 9)
+        if delta <= self._deadband or delta <= abs(published) * self._deadband_percent / 100:
+            return self._max_staleness - elapsed if self._max_staleness else 0
+        return None
+
+    @callback
+    def _async_publish_pending(self, _now) -> None:
+        self._unsub_publish = None
+        self._handle_coordinator_update()
+
+    @callback
+    def _cancel_publish(self) -> None:
+        if self._unsub_publish is not None:
+            self._unsub_publish()
+            self._unsub_publish = None
+
+
+class HttpcontrolStatsSensor(HttpcontrolEntity, SensorEntity):
+    entity_description: HttpcontrolStatsSensorDescription
+
+    def __init__(self, coordinator: HttpcontrolCoordinator, description: HttpcontrolStatsSensorDescription):
+        super().__init__(coordinator, description)
+        # request statistics change with every poll, not with the board state
+        self.coordinator_context = None
+
+    @property
+    def available(self) -> bool:
+        return True
 
     @property
     def native_value(self) -> float | int | None:
-        return self.entity_description.value_fn(self.coordinator.data.state[self.entity_description.key])
+        return self.entity_description.stats_fn(self.coordinator.stats)
+
+class HttpcontrolFleetSensor(SensorEntity):
+    entity_description: HttpcontrolFleetSensorDescription
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_device_info = FLEET_DEVICE_INFO
+
+    def __init__(self, fleet: HttpcontrolFleet, description: HttpcontrolFleetSensorDescription):
+        self.fleet = fleet
+        self.entity_description = description
+        self._attr_unique_id = f"{DOMAIN}_{description.key}"
+        self._result = {}
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.fleet.async_add_listener(self._handle_fleet_update))
+        self._update()
+
+    @callback
+    def _handle_fleet_update(self) -> None:
+        self._update()
+        self.async_write_ha_state()
+
+    def _update(self) -> None:
+        description = self.entity_description
+        self._result = self.fleet.query(description.stat, description.keys, device_class=description.filter_device_class)
+
+    @property
+    def native_value(self) -> float | int | None:
+        return self._result.get("value")
+
+    @property
+    def extra_state_attributes(self):
+        return { key: value for key, value in self._result.items() if key != "value" }
+
+def _option(value, options, key, default):
+    # an entry-wide option overrides the per-sensor default only once it is set
+    if key in options:
+        return options[key]
+    return value if value is not None else default
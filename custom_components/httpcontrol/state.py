@@ -0,0 +1,89 @@
+from collections.abc import Iterator, Mapping, MutableMapping
+from sys import intern
+from typing import Any
+
+_MISSING = object()
+
+
+class HttpcontrolStateLayout:
+    __slots__ = ("index", "keys")
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.keys: list[str] = []
+
+    def slot(self, key: str) -> int:
+        if (i := self.index.get(key)) is None:
+            i = self.index[key] = len(self.keys)
+            self.keys.append(key)
+        return i
+
+
+# one key index per model, shared by every device of that model
+_LAYOUTS: dict[str, HttpcontrolStateLayout] = {}
+
+
+def state_layout(model: str) -> HttpcontrolStateLayout:
+    if (layout := _LAYOUTS.get(model)) is None:
+        layout = _LAYOUTS[model] = HttpcontrolStateLayout()
+    return layout
+
+
+class HttpcontrolState(MutableMapping):
+    __slots__ = ("_layout", "_values", "_len")
+
+    def __init__(self, layout: HttpcontrolStateLayout, data: Mapping = {}):
+        self._layout = layout
+        self._values: list = []
+        self._len = 0
+        for key, value in data.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._layout.index.get(key)
+        if i is None or i >= len(self._values) or (value := self._values[i]) is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._layout.index.get(key)
+        if i is None or i >= len(self._values) or (value := self._values[i]) is _MISSING:
+            return default
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        i = self._layout.index.get(key)
+        return i is not None and i < len(self._values) and self._values[i] is not _MISSING
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        i = self._layout.slot(key)
+        values = self._values
+        if i >= len(values):
+            values.extend([_MISSING] * (i + 1 - len(values)))
+        if values[i] is _MISSING:
+            self._len += 1
+        # raw values repeat across devices ("0", "1", "up"), keep one copy of each
+        values[i] = intern(value) if type(value) is str else value
+
+    def __delitem__(self, key: str) -> None:
+        i = self._layout.index.get(key)
+        if i is None or i >= len(self._values) or self._values[i] is _MISSING:
+            raise KeyError(key)
+        self._values[i] = _MISSING
+        self._len -= 1
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self._layout.keys
+        return (keys[i] for i, value in enumerate(self._values) if value is not _MISSING)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def replace(self, data: Mapping) -> None:
+        for key in [key for key in self if key not in data]:
+            del self[key]
+        for key, value in data.items():
+            self[key] = value
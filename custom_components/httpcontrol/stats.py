@@ -0,0 +1,124 @@
+from bisect import bisect_left
+from collections import deque
+from time import time
+
+from .trace import ERROR_TIMEOUT
+
+ERROR_AUTH = "auth"
+
+# latency histogram bucket upper bounds [ms], the last bucket is unbounded
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+RECENT_SAMPLES = 100
+SUMMARY_PERCENTILE = 95
+
+
+def percentile(samples, percentile: int) -> float | None:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, len(samples) * percentile // 100)]
+
+
+class HttpcontrolHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, ms: float) -> None:
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else None,
+            "buckets": {
+                **{ f"le_{bound}": n for bound, n in zip(HISTOGRAM_BUCKETS, self.buckets) },
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class HttpcontrolStats:
+    def __init__(self):
+        self.latency: dict[str, HttpcontrolHistogram] = {}
+        self.parse = HttpcontrolHistogram()
+        self.poll_lag = HttpcontrolHistogram()
+        self.requests = 0
+        self.response_bytes = 0
+        self.timeouts = 0
+        self.connection_errors = 0
+        self.auth_failures = 0
+        self.samples = deque(maxlen=RECENT_SAMPLES)
+        self._latency_ms = deque(maxlen=RECENT_SAMPLES)
+        self._parse_ms = deque(maxlen=RECENT_SAMPLES)
+        self._size = deque(maxlen=RECENT_SAMPLES)
+        self._lag_ms = deque(maxlen=RECENT_SAMPLES)
+
+    @staticmethod
+    def endpoint(path: str) -> str:
+        return path.partition("?")[0]
+
+    def add_request(self, path: str, rtt: float, size: int, parse: float) -> None:
+        endpoint = self.endpoint(path)
+        rtt_ms, parse_ms = rtt * 1000, parse * 1000
+        if (histogram := self.latency.get(endpoint)) is None:
+            histogram = self.latency[endpoint] = HttpcontrolHistogram()
+        histogram.add(rtt_ms)
+        self.parse.add(parse_ms)
+        self.requests += 1
+        self.response_bytes += size
+        self._latency_ms.append(rtt_ms)
+        self._parse_ms.append(parse_ms)
+        self._size.append(size)
+        self.samples.append({
+            "time": round(time(), 3),
+            "path": endpoint,
+            "latency_ms": round(rtt_ms, 2),
+            "parse_ms": round(parse_ms, 3),
+            "bytes": size,
+        })
+
+    def add_error(self, path: str, error: str) -> None:
+        if error == ERROR_TIMEOUT:
+            self.timeouts += 1
+        elif error == ERROR_AUTH:
+            self.auth_failures += 1
+        else:
+            self.connection_errors += 1
+        self.samples.append({"time": round(time(), 3), "path": self.endpoint(path), "error": error})
+
+    def add_poll_lag(self, lag: float) -> None:
+        self.poll_lag.add(lag * 1000)
+        self._lag_ms.append(lag * 1000)
+
+    @property
+    def latency_ms(self) -> float | None:
+        return percentile(self._latency_ms, SUMMARY_PERCENTILE)
+
+    @property
+    def parse_ms(self) -> float | None:
+        return percentile(self._parse_ms, SUMMARY_PERCENTILE)
+
+    @property
+    def poll_lag_ms(self) -> float | None:
+        return percentile(self._lag_ms, SUMMARY_PERCENTILE)
+
+    @property
+    def response_size(self) -> float | None:
+        return sum(self._size) / len(self._size) if self._size else None
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "response_bytes": self.response_bytes,
+            "timeouts": self.timeouts,
+            "connection_errors": self.connection_errors,
+            "auth_failures": self.auth_failures,
+            "latency": { endpoint: histogram.as_dict() for endpoint, histogram in self.latency.items() },
+            "parse": self.parse.as_dict(),
+            "poll_lag": self.poll_lag.as_dict(),
+            "recent": list(self.samples),
+        }
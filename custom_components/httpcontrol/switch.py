@@ -16,6 +16,7 @@ from .entity import HttpcontrolEntity
 class HttpcontrolSwitchDescription(SwitchEntityDescription):
     entity_registry_enabled_default: bool = True
     device_class=SwitchDeviceClass.SWITCH,
+    value_fn: Callable = lambda x: bool(int(x))
 
 SWITCHES_1x = [
     HttpcontrolSwitchDescription(
@@ -37,17 +38,39 @@ SWITCHES = {
     "3.x": SWITCHES_2x,
 }
 
+INVERT_KEYS = {
+    "1.x": "out5",
+    "2.x": "out6",
+}
+
+INVERT_SWITCH_1x = HttpcontrolSwitchDescription(
+    key="out5",
+    name="Reverse out state",
+    entity_category=EntityCategory.CONFIG,
+)
+
+INVERT_SWITCH_2x = HttpcontrolSwitchDescription(
+    key="out6",
+    name="Reverse out state",
+    entity_category=EntityCategory.CONFIG,
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     coordinator: HttpcontrolCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.async_add_decoders(SWITCHES[coordinator.data.model])
+    if coordinator.is_1x():
+        coordinator.async_add_decoders([INVERT_SWITCH_1x])
+    if coordinator.is_2x():
+        coordinator.async_add_decoders([INVERT_SWITCH_2x])
 
     async_add_entities(
         HttpcontrolSwitch(coordinator, entity)
         for entity in SWITCHES[coordinator.data.model]
-        if entity.key in coordinator.data.state
+        if entity.key in coordinator.available_keys
     )
 
     if coordinator.is_1x():
@@ -60,14 +83,15 @@ class HttpcontrolSwitch(HttpcontrolEntity, SwitchEntity):
     entity_description: HttpcontrolSwitchDescription
 
     def __init__(self, coordinator: HttpcontrolCoordinator, description: HttpcontrolSwitchDescription):
-        super().__init__(coordinator, description)
+        invert_key = INVERT_KEYS.get(coordinator.data.model)
+        super().__init__(coordinator, description, (invert_key,) if invert_key else ())
 
     @property
-    def is_on(self) -> bool:
-        value = bool(int(self.coordinator.data.state[self.entity_description.key]))
-        if self._invert():
-            value = not value
-        return value
+    def is_on(self) -> bool | None:
+        value = self.coordinator.data.values.get(self.entity_description.key)
+        if value is None:
+            return None
+        return not value if self._invert() else value
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
@@ -85,49 +109,38 @@ class HttpcontrolSwitch(HttpcontrolEntity, SwitchEntity):
         await self.coordinator.async_set_out(self.entity_description.key, value)
 
     def _invert(self) -> bool:
-        if self.coordinator.is_1x():
-            return bool(int(self.coordinator.data.state.get("out5", 0)))
-        elif self.coordinator.is_2x():
-            return bool(int(self.coordinator.data.state.get("out6", 0)))
-        else:
-            return False
+        if invert_key := INVERT_KEYS.get(self.coordinator.data.model):
+            return bool(self.coordinator.data.values.get(invert_key))
+        return False
 
 class Httpcontrol1xInvertSwitch(HttpcontrolSwitch):
     def __init__(self, coordinator: HttpcontrolCoordinator):
-        super().__init__(coordinator, HttpcontrolSwitchDescription(
-            key="out5",
-            name="Reverse out state",
-            entity_category=EntityCategory.CONFIG,
-        ))
+        super().__init__(coordinator, INVERT_SWITCH_1x)
 
     @property
-    def is_on(self) -> bool:
-        return not bool(int(self.coordinator.data.state["out5"]))
+    def is_on(self) -> bool | None:
+        if (value := self.coordinator.data.values.get("out5")) is None:
+            return None
+        return not value
 
     async def async_turn_on(self) -> None:
-        self.coordinator.data.state["out5"] = "0"
-        await self.coordinator.async_set_out("out", 5)
+        await self.coordinator.async_set_out("out", 5, {"out5": "0"})
 
     async def async_turn_off(self) -> None:
-        self.coordinator.data.state["out5"] = "1"
-        await self.coordinator.async_set_out("out", 6)
+        await self.coordinator.async_set_out("out", 6, {"out5": "1"})
 
 class Httpcontrol2xInvertSwitch(HttpcontrolSwitch):
     def __init__(self, coordinator: HttpcontrolCoordinator):
-        super().__init__(coordinator, HttpcontrolSwitchDescription(
-            key="out6",
-            name="Reverse out state",
-            entity_category=EntityCategory.CONFIG,
-        ))
+        super().__init__(coordinator, INVERT_SWITCH_2x)
 
     @property
-    def is_on(self) -> bool:
-        return not bool(int(self.coordinator.data.state["out6"]))
+    def is_on(self) -> bool | None:
+        if (value := self.coordinator.data.values.get("out6")) is None:
+            return None
+        return not value
 
     async def async_turn_on(self) -> None:
-        self.coordinator.data.state["out6"] = "0"
-        await self.coordinator.async_set_out("out", 6)
+        await self.coordinator.async_set_out("out", 6, {"out6": "0"})
 
     async def async_turn_off(self) -> None:
-        self.coordinator.data.state["out6"] = "1"
-        await self.coordinator.async_set_out("out", 7)
+        await self.coordinator.async_set_out("out", 7, {"out6": "1"})
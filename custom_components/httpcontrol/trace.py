@@ -0,0 +1,121 @@
+import asyncio
+import base64
+import gzip
+import json
+from collections import defaultdict, deque
+from time import monotonic
+
+from aiohttp import ClientConnectionError, ClientResponseError
+
+TRACE_VERSION = 1
+TRACE_FLUSH_RECORDS = 100
+
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+
+
+def trace_open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(record: dict) -> bytes:
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return record.get("body", "").encode("utf-8")
+
+
+class HttpcontrolTraceRecorder:
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self._start = monotonic()
+        self._buffer = [{"trace": TRACE_VERSION, **meta}]
+        self._lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    def record(self, path: str, rtt: float, status: int | None = None, headers=None, body: bytes | None = None, error: str | None = None) -> None:
+        record = {"t": round(max(0.0, monotonic() - self._start - rtt), 4), "path": path, "rtt": round(rtt, 4)}
+        if error is not None:
+            record["error"] = error
+        else:
+            record["status"] = status
+            record["headers"] = { key.lower(): value for key, value in headers.items() if key.lower() == "content-type" }
+            record.update(_encode_body(body))
+        self._buffer.append(record)
+        if len(self._buffer) >= TRACE_FLUSH_RECORDS and not self._lock.locked():
+            self._flush_task = asyncio.create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        # file writes run in the executor, the lock keeps them in order
+        async with self._lock:
+            records, self._buffer = self._buffer, []
+            if records:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, records)
+
+    def _write(self, records: list[dict]) -> None:
+        with trace_open(self.path, "a") as file:
+            for record in records:
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def load_trace(path: str) -> tuple[dict, list[dict]]:
+    meta = {}
+    records = []
+    with trace_open(path, "r") as file:
+        for line in file:
+            record = json.loads(line)
+            if "trace" in record:
+                # appended recordings start with a new header
+                meta = meta or record
+            else:
+                records.append(record)
+    return meta, records
+
+
+class _ReplayResponse:
+    def __init__(self, record: dict):
+        self.status = record["status"]
+        self.headers = record["headers"]
+        self._body = _decode_body(record)
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise ClientResponseError(None, (), status=self.status)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode("utf-8")
+
+
+class HttpcontrolTraceReplay:
+    def __init__(self, records: list[dict], speed: float = 0, loop: bool = True):
+        self.speed = speed
+        self.loop = loop
+        self._records = defaultdict(deque)
+        for record in records:
+            self._records[record["path"].partition("?")[0]].append(record)
+
+    async def async_respond(self, path: str) -> _ReplayResponse:
+        records = self._records.get(path.partition("?")[0])
+        if not records:
+            raise ClientConnectionError(f"No recorded response for {path}")
+        record = records.popleft()
+        if self.loop:
+            records.append(record)
+        if self.speed > 0:
+            await asyncio.sleep(record["rtt"] / self.speed)
+        if (error := record.get("error")) == ERROR_TIMEOUT:
+            raise asyncio.TimeoutError()
+        if error is not None:
+            raise ClientConnectionError(error)
+        return _ReplayResponse(record)
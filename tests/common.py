@@ -0,0 +1,126 @@
+import asyncio
+import inspect
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl
+
+from aiohttp import ClientConnectionError, ClientResponseError
+from homeassistant.const import (
+    ATTR_HW_VERSION,
+    ATTR_SW_VERSION,
+    CONF_HOST,
+    CONF_MAC,
+    CONF_MODEL,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_USERNAME,
+)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.httpcontrol.const import DOMAIN
+from custom_components.httpcontrol.coordinator import HttpcontrolCoordinator
+from custom_components.httpcontrol.parser import CONTENT_TYPE_XML
+
+MAC = "02:00:00:00:00:01"
+
+
+def device_entry(hass, model="2.x", scan_interval=30, options=None, mac=MAC) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=f"box {mac[-2:]}",
+        unique_id=mac,
+        data={
+            CONF_HOST: "192.0.2.1",
+            CONF_USERNAME: "",
+            CONF_PASSWORD: "",
+            CONF_MODEL: model,
+            ATTR_HW_VERSION: "6",
+            ATTR_SW_VERSION: "2.13",
+            CONF_MAC: mac,
+            CONF_SCAN_INTERVAL: scan_interval,
+        },
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+def xml(**items) -> tuple[str, str]:
+    body = "".join(f"<{key}>{value}</{key}>" for key, value in items.items())
+    return CONTENT_TYPE_XML, f'<?xml version="1.0" encoding="utf-8"?><response>{body}</response>'
+
+
+def st0(**values) -> tuple[str, str]:
+    return xml(**{"out0": "0", "out1": "0", "di0": "down", "ia0": "249", "sec0": "1", "sec1": "0", "sec2": "0", "sec3": "0", **values})
+
+
+def st2() -> tuple[str, str]:
+    items = {"mm": "m3", "d": "*".join([f"T{i}" for i in range(6)] + [f"DI{i}" for i in range(4)])}
+    items.update({ f"r{i}": "0" for i in range(6) })
+    items.update({ f"r{i + 6}": f"Out {i}" for i in range(6) })
+    return xml(**items)
+
+
+class FakeResponse:
+    def __init__(self, status: int, content_type: str, body: str):
+        self.status = status
+        self.headers = {"content-type": content_type}
+        self._body = body.encode("utf-8")
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise ClientResponseError(None, (), status=self.status)
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+# stands in for the client's aiohttp session, a route takes the query and
+# returns (content type, body), may be a coroutine or raise
+class FakeSession:
+    closed = False
+
+    def __init__(self, routes: dict):
+        self.routes = routes
+        self.requests: list[str] = []
+
+    @asynccontextmanager
+    async def get(self, url: str, **kwargs):
+        host, path = url.split("/", 3)[2:]
+        self.requests.append(path)
+        name, _, query = path.partition("?")
+        # routes may be bound to one host, "192.0.2.1/board.xml"
+        if (route := self.routes.get(f"{host}/{name}", self.routes.get(name))) is None:
+            raise ClientConnectionError(f"{host} does not answer {name}")
+        result = route(dict(parse_qsl(query)))
+        if inspect.isawaitable(result):
+            result = await result
+        yield FakeResponse(200, *result)
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.get(url, **kwargs)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def fake_coordinator(hass, routes: dict, **entry_args) -> tuple[HttpcontrolCoordinator, FakeSession]:
+    coordinator = HttpcontrolCoordinator(hass, device_entry(hass, **entry_args))
+    session = coordinator.client._session = FakeSession(routes)
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    session.requests.clear()
+    return coordinator, session
+
+
+def outs_response(outs: list[int]):
+    def _respond(query: dict) -> tuple[str, str]:
+        for key, value in query.items():
+            outs[int(key[3:])] = int(value)
+        return "text/plain", "".join(str(value) for value in outs)
+    return _respond
+
+
+async def wait_until(predicate, timeout: float = 1) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0)
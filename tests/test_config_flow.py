@@ -0,0 +1,128 @@
+import json
+from unittest.mock import patch
+
+from homeassistant.config_entries import SOURCE_USER
+from homeassistant.const import CONF_HOST, CONF_MODEL
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.httpcontrol.const import (
+    DOMAIN,
+    CONF_ADAPTIVE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_NETWORK,
+    CONF_DEVICES,
+    FLEET_NAME,
+)
+from custom_components.httpcontrol.fleet import is_fleet_entry
+from custom_components.httpcontrol.parser import CONTENT_TYPE_JSON
+
+from .common import MAC, FakeSession, device_entry, xml
+
+
+async def test_options_reject_inverted_scan_range(hass, enable_custom_integrations):
+    entry = device_entry(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {
+        CONF_MIN_SCAN_INTERVAL: 60,
+        CONF_MAX_SCAN_INTERVAL: 10,
+    })
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_scan_range"}
+    assert entry.options == {}
+
+
+async def test_options_keep_scan_interval_inside_adaptive_range(hass, enable_custom_integrations):
+    entry = device_entry(hass, scan_interval=30)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {
+        CONF_ADAPTIVE: True,
+        CONF_MIN_SCAN_INTERVAL: 60,
+        CONF_MAX_SCAN_INTERVAL: 600,
+    })
+    assert result["errors"] == {"base": "scan_interval_out_of_range"}
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {
+        CONF_ADAPTIVE: True,
+        CONF_MIN_SCAN_INTERVAL: 10,
+        CONF_MAX_SCAN_INTERVAL: 600,
+    })
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_MIN_SCAN_INTERVAL] == 10
+    assert entry.options[CONF_MAX_SCAN_INTERVAL] == 600
+
+
+def _board_routes(host, mac, name):
+    return {
+        f"{host}/board.xml": lambda _: xml(b6=mac, b7=name),
+        f"{host}/st2.xml": lambda _: xml(hw="6", ver="2.13"),
+    }
+
+
+def _board_3x_routes(host, mac, name):
+    return {
+        f"{host}/json/all.json": lambda _: (CONTENT_TYPE_JSON, json.dumps({"mac": mac, "hw": "3.0", "sw": "1.60"})),
+        f"{host}/json/network.json": lambda _: (CONTENT_TYPE_JSON, json.dumps({"sname": name})),
+    }
+
+
+async def test_scan_creates_selected_boards(hass, enable_custom_integrations):
+    session = FakeSession({
+        **_board_routes("192.0.2.2", "02:00:00:00:00:02", "boiler"),
+        **_board_3x_routes("192.0.2.5", "02:00:00:00:00:05", "garage"),
+        **_board_routes("192.0.2.6", MAC, "configured"),
+    })
+    device_entry(hass, mac=MAC)
+    with (
+        patch("custom_components.httpcontrol.config_flow.async_get_clientsession", return_value=session),
+        patch("custom_components.httpcontrol.async_setup_entry", return_value=True),
+    ):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+        assert result["type"] is FlowResultType.MENU
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "scan"})
+        assert result["step_id"] == "scan"
+
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_NETWORK: "192.0.2.0/24"})
+        assert result["type"] is FlowResultType.SHOW_PROGRESS
+        await hass.async_block_till_done()
+
+        result = await hass.config_entries.flow.async_configure(result["flow_id"])
+        assert result["type"] is FlowResultType.FORM
+        assert result["step_id"] == "scan_select"
+        devices = result["data_schema"].schema[CONF_DEVICES].options
+        assert sorted(devices) == ["02:00:00:00:00:02", "02:00:00:00:00:05"]
+
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_DEVICES: sorted(devices)})
+        assert result["type"] is FlowResultType.CREATE_ENTRY
+        assert result["title"] == "boiler"
+        await hass.async_block_till_done()
+
+    entries = { entry.unique_id: entry for entry in hass.config_entries.async_entries(DOMAIN) }
+    assert entries["02:00:00:00:00:05"].title == "garage"
+    assert entries["02:00:00:00:00:05"].data[CONF_MODEL] == "3.x"
+    assert entries["02:00:00:00:00:02"].data[CONF_HOST] == "192.0.2.2"
+
+
+async def test_scan_rejects_a_large_network(hass, enable_custom_integrations):
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "scan"})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_NETWORK: "10.0.0.0/16"})
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_NETWORK: "invalid_network"}
+
+
+async def test_fleet_entry_is_opt_in(hass, enable_custom_integrations):
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+    assert result["menu_options"] == ["manual", "scan", "fleet"]
+    with patch("custom_components.httpcontrol.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "fleet"})
+        await hass.async_block_till_done()
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["title"] == FLEET_NAME
+    (entry,) = hass.config_entries.async_entries(DOMAIN)
+    assert is_fleet_entry(entry)
+
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+    assert result["menu_options"] == ["manual", "scan"]
@@ -0,0 +1,118 @@
+import asyncio
+
+from aiohttp import ClientConnectionError
+
+from custom_components.httpcontrol.coordinator import CACHE_SAVE_DELAY, COMMAND_COALESCE_WINDOW
+
+from .common import fake_coordinator, outs_response, st0, st2, wait_until
+
+
+async def test_writes_within_the_window_share_one_request(hass):
+    outs = [0] * 7
+    coordinator, session = await fake_coordinator(hass, {
+        "st2.xml": lambda _: st2(),
+        "st0.xml": lambda _: st0(),
+        "outs.cgi": outs_response(outs),
+    })
+
+    await asyncio.gather(
+        coordinator.async_set_out("out0", 1),
+        coordinator.async_set_out("out1", 1),
+        coordinator.async_set_out("out0", 0),
+    )
+    assert session.requests == ["outs.cgi?out0=0&out1=1"]
+    assert coordinator.data.state["out0"] == "0"
+    assert coordinator.data.state["out1"] == "1"
+
+    await asyncio.sleep(COMMAND_COALESCE_WINDOW * 2)
+    await coordinator.async_set_out("out0", 1)
+    assert session.requests == ["outs.cgi?out0=0&out1=1", "outs.cgi?out0=1"]
+    assert coordinator.data.state["out0"] == "1"
+    await coordinator.async_close()
+
+
+async def test_failed_coalesced_write_rolls_back_every_output(hass):
+    def _fail(_query):
+        raise ClientConnectionError()
+
+    coordinator, session = await fake_coordinator(hass, {
+        "st2.xml": lambda _: st2(),
+        "st0.xml": lambda _: st0(),
+        "outs.cgi": _fail,
+    })
+    results = await asyncio.gather(
+        coordinator.async_set_out("out0", 1),
+        coordinator.async_set_out("out1", 1),
+        return_exceptions=True,
+    )
+    assert len(session.requests) == 1
+    assert all(isinstance(result, Exception) for result in results)
+    assert coordinator.data.state["out0"] == coordinator.data.state["out1"] == "0"
+    await coordinator.async_close()
+
+
+async def test_command_drops_polls_queued_behind_it(hass):
+    outs = [0] * 7
+    released = asyncio.Event()
+
+    async def _slow_st0(_query):
+        await released.wait()
+        return st0()
+
+    coordinator, session = await fake_coordinator(hass, {
+        "st2.xml": lambda _: st2(),
+        "st0.xml": lambda _: st0(),
+        "outs.cgi": outs_response(outs),
+    })
+    session.routes["st0.xml"] = _slow_st0
+
+    # a poll holds the device, a command, another poll and a metadata read queue up
+    first_poll = hass.async_create_task(coordinator.async_refresh())
+    await wait_until(lambda: session.requests == ["st0.xml"])
+    command = hass.async_create_task(coordinator.async_set_out("out0", 1))
+    await asyncio.sleep(COMMAND_COALESCE_WINDOW * 2)
+    queued_poll = hass.async_create_task(coordinator.async_refresh())
+    metadata = hass.async_create_task(coordinator._async_fetch_metadata())
+    await asyncio.sleep(0)
+
+    released.set()
+    await asyncio.gather(first_poll, command, queued_poll, metadata)
+    assert session.requests == ["st0.xml", "outs.cgi?out0=1", "st2.xml"]
+    assert coordinator.last_update_success
+    assert coordinator.data.state["out0"] == "1"
+    assert coordinator.labels["out0"] == "Out 0"
+    await coordinator.async_close()
+
+
+async def test_cache_is_saved_at_most_once_per_delay(hass, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("custom_components.httpcontrol.coordinator.monotonic", lambda: now[0])
+    extra = {}
+    coordinator, _ = await fake_coordinator(hass, {
+        "st2.xml": lambda _: st2(),
+        "st0.xml": lambda _: st0(**extra),
+    })
+    saves = []
+    monkeypatch.setattr(coordinator._store, "async_delay_save", lambda data_func, delay=0: saves.append(data_func()))
+
+    for _ in range(3):
+        now[0] += 1
+        await coordinator.async_refresh()
+    assert saves == []
+
+    now[0] += CACHE_SAVE_DELAY
+    await coordinator.async_refresh()
+    assert len(saves) == 1
+
+    # a new key or new metadata is written right away
+    extra["ia1"] = "100"
+    await coordinator.async_refresh()
+    assert len(saves) == 2
+    assert "ia1" in saves[-1]["available_keys"]
+    await coordinator.async_refresh()
+    assert len(saves) == 2
+
+    await coordinator._async_fetch_metadata()
+    assert len(saves) == 3
+    assert saves[-1]["labels"]["out0"] == "Out 0"
+    await coordinator.async_close()
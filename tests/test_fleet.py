@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.httpcontrol.fleet import (
+    GROUP_BY_DEVICE,
+    GROUP_BY_KEY,
+    GROUP_BY_MODEL,
+    HttpcontrolFleet,
+)
+
+TEMPERATURE = "temperature"
+
+
+class _Device:
+    def __init__(self, title, model, values, labels=None):
+        self.entry = SimpleNamespace(title=title)
+        self.data = SimpleNamespace(model=model, values=values)
+        self.last_update_success = True
+        self.device_classes = { key: TEMPERATURE for key in values if key.startswith(("ds", "ia")) }
+        self.labels = labels or {}
+
+
+def _fleet():
+    fleet = HttpcontrolFleet(None)
+    devices = [
+        _Device("boiler", "3.x", {"ds1": 21.5, "ds2": 40.0, "ind0": 1, "ind1": 0}, {"ds1": "Rack 1 top"}),
+        _Device("garage", "3.x", {"ds1": 5.0, "ds2": None, "ind0": 0, "ind1": 0}, {"ds1": "Rack 2 top"}),
+        _Device("attic", "2.x", {"ia7": 30.25, "di0": 1, "sw": "2.13"}),
+    ]
+    for device in devices:
+        fleet.async_add(device)
+    return fleet, devices
+
+
+def test_query_reduces_matching_columns():
+    fleet, _ = _fleet()
+    assert fleet.query("min", "ds*") == {"value": 5.0, "count": 3, "device": "garage", "key": "ds1"}
+    assert fleet.query("max", "ds*,ia*") == {"value": 40.0, "count": 4, "device": "boiler", "key": "ds2"}
+    assert fleet.query("mean", "ds1") == {"value": 13.25, "count": 2}
+    assert fleet.query("sum", "*", device_class=TEMPERATURE) == {"value": 96.75, "count": 4}
+    assert fleet.query("count", "ind*,di*") == {"value": 5}
+    assert fleet.query("count_on", "ind*,di*") == {"value": 2}
+    assert fleet.query("mean", "nothing") == {"value": None, "count": 0}
+
+
+def test_query_filters_and_groups():
+    fleet, _ = _fleet()
+    assert fleet.query("count", "*", model="2.x") == {"value": 2}
+    assert fleet.query("max", "ds*", label="Rack 2*") == {"value": 5.0, "count": 1, "device": "garage", "key": "ds1"}
+    assert fleet.query("count", "ds*,ia*", group_by=GROUP_BY_MODEL) == {"2.x": {"value": 1}, "3.x": {"value": 3}}
+    assert fleet.query("mean", "ds*", group_by=GROUP_BY_DEVICE) == {
+        "boiler": {"value": 30.75, "count": 2},
+        "garage": {"value": 5.0, "count": 1},
+    }
+    assert list(fleet.query("count", "ds*", group_by=GROUP_BY_KEY)) == ["ds1", "ds2"]
+
+
+def test_updates_reach_cached_queries():
+    fleet, (boiler, garage, attic) = _fleet()
+    assert fleet.query("max", "ds1")["value"] == 21.5
+    assert fleet.as_dict()["cached_queries"] == 1
+
+    # a changed value is read from the column, a new value changes the selection
+    boiler.data.values["ds1"] = 25.0
+    garage.data.values["ds2"] = 50.0
+    fleet.async_update(boiler, {"ds1"})
+    fleet.async_update(garage, {"ds2"})
+    assert fleet.query("max", "ds1")["value"] == 25.0
+    assert fleet.query("max", "ds*") == {"value": 50.0, "count": 4, "device": "garage", "key": "ds2"}
+
+    # an unavailable board drops out, its row is reused by the next one
+    garage.last_update_success = False
+    fleet.async_update(garage, None)
+    assert fleet.query("count", "ds*") == {"value": 2}
+    fleet.async_remove(garage)
+    cellar = _Device("cellar", "3.x", {"ds1": -2.0})
+    fleet.async_add(cellar)
+    assert cellar.fleet_row == 1
+    assert fleet.query("min", "ds*")["device"] == "cellar"
+    assert fleet.as_dict()["devices"] == 3
+
+
+@pytest.mark.parametrize("stat", ["min", "max", "mean", "sum", "count", "count_on"])
+def test_query_matches_a_plain_scan(stat):
+    fleet, devices = _fleet()
+    values = [
+        value
+        for device in devices
+        for key, value in device.data.values.items()
+        if key.startswith("ds") and isinstance(value, (int, float))
+    ]
+    expected = {
+        "min": min(values),
+        "max": max(values),
+        "mean": sum(values) / len(values),
+        "sum": sum(values),
+        "count": len(values),
+        "count_on": sum(value != 0 for value in values),
+    }[stat]
+    assert fleet.query(stat, "ds*")["value"] == pytest.approx(expected)
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from custom_components.httpcontrol.requests import (
+    HttpcontrolCircuitBreaker,
+    HttpcontrolClient,
+    HttpcontrolRttEstimator,
+    HttpcontrolUnavailableError,
+    BREAKER_BACKOFF,
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_OPEN,
+    BREAKER_THRESHOLD,
+    MAX_TIMEOUT,
+    MIN_TIMEOUT,
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    RTT_SAMPLES,
+    TIMEOUT_FACTOR,
+)
+from custom_components.httpcontrol.trace import ERROR_TIMEOUT, HttpcontrolTraceReplay
+
+from .common import FakeSession, st0
+
+
+def test_timeout_grows_when_device_gets_slower():
+    rtt = HttpcontrolRttEstimator()
+    for _ in range(RTT_SAMPLES):
+        rtt.add(0.02)
+    assert rtt.timeout == MIN_TIMEOUT
+
+    # the box moved to a congested network, every request now takes 2 s
+    timeouts = []
+    while (timeout := rtt.timeout) < 2:
+        timeouts.append(timeout)
+        rtt.add_timeout(timeout)
+        assert len(timeouts) < 5
+    assert timeouts == sorted(timeouts)
+
+    for _ in range(RTT_SAMPLES):
+        rtt.add(2.0)
+    assert rtt.timeout == min(2.0 * TIMEOUT_FACTOR, MAX_TIMEOUT)
+
+
+def test_client_counts_timeouts_as_samples():
+    async def run():
+        client = HttpcontrolClient("192.0.2.1", "", "")
+        client.replay = HttpcontrolTraceReplay([{"path": "st0.xml", "rtt": 0.5, "error": ERROR_TIMEOUT}])
+        for _ in range(RTT_SAMPLES):
+            client.rtt.add(0.02)
+
+        timeouts = []
+        for _ in range(2):
+            timeouts.append(client.rtt.timeout)
+            with pytest.raises(asyncio.TimeoutError):
+                await client.async_get("st0.xml")
+        await client.async_close()
+        return timeouts, client.rtt.timeout
+
+    timeouts, timeout = asyncio.run(run())
+    assert timeouts[0] == MIN_TIMEOUT
+    assert timeouts[0] < timeouts[1] < timeout
+
+
+def test_breaker_opens_probes_and_closes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("custom_components.httpcontrol.requests.monotonic", lambda: now[0])
+    device = {"up": False}
+
+    def _st0(_query):
+        if not device["up"]:
+            raise ClientConnectionError()
+        return st0()
+
+    async def run():
+        client = HttpcontrolClient("192.0.2.1", "", "")
+        session = client._session = FakeSession({"st0.xml": _st0, "outs.cgi": lambda _: ("text/plain", "1")})
+        breaker = client.breaker
+
+        for _ in range(BREAKER_THRESHOLD):
+            assert breaker.state == BREAKER_CLOSED
+            with pytest.raises(ClientConnectionError):
+                await client.async_get("st0.xml")
+        assert breaker.state == BREAKER_OPEN
+
+        # while open nothing reaches the device, commands fail fast until a poll got through
+        requests = len(session.requests)
+        for priority in (PRIORITY_POLL, PRIORITY_COMMAND):
+            with pytest.raises(HttpcontrolUnavailableError):
+                await client.async_get("st0.xml", priority=priority)
+        assert len(session.requests) == requests
+
+        # a failed probe doubles the backoff
+        now[0] += BREAKER_BACKOFF
+        with pytest.raises(HttpcontrolUnavailableError):
+            await client.async_get("outs.cgi?out0=1", priority=PRIORITY_COMMAND)
+        with pytest.raises(ClientConnectionError):
+            await client.async_get("st0.xml")
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.retry_in == BREAKER_BACKOFF * 2
+
+        now[0] += BREAKER_BACKOFF
+        with pytest.raises(HttpcontrolUnavailableError):
+            await client.async_get("st0.xml")
+
+        device["up"] = True
+        now[0] += BREAKER_BACKOFF
+        assert await client.async_get("st0.xml")
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.failures == 0
+        assert await client.async_get("outs.cgi?out0=1", priority=PRIORITY_COMMAND) == "1"
+        await client.async_close()
+
+    asyncio.run(run())
+
+
+def test_breaker_caps_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("custom_components.httpcontrol.requests.monotonic", lambda: now[0])
+    breaker = HttpcontrolCircuitBreaker("192.0.2.1")
+    for _ in range(BREAKER_THRESHOLD):
+        breaker.failure()
+    for _ in range(20):
+        now[0] += breaker.retry_in
+        breaker.check(True)
+        assert breaker.state == BREAKER_HALF_OPEN
+        breaker.failure()
+    assert breaker.backoff == BREAKER_MAX_BACKOFF
+
+    # a probe that ends without an answer, e.g. cancelled, does not leave it half open
+    now[0] += breaker.retry_in
+    breaker.check(True)
+    breaker.abort()
+    assert breaker.state == BREAKER_OPEN
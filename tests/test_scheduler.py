@@ -0,0 +1,67 @@
+from datetime import timedelta
+from time import perf_counter
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.httpcontrol.scheduler import REBALANCE_DELAY, HttpcontrolScheduler
+
+
+class _Coordinator:
+    poll_interval = timedelta(seconds=60)
+    scheduler = None
+
+    def __init__(self, name):
+        self.name = name
+
+
+async def test_new_devices_fill_the_largest_gap(hass):
+    scheduler = HttpcontrolScheduler(hass)
+    coordinators = [_Coordinator(f"box{index}") for index in range(5)]
+    for coordinator in coordinators:
+        scheduler.async_add(coordinator)
+    assert [scheduler._phases[coordinator] for coordinator in coordinators] == [0.0, 0.5, 0.25, 0.75, 0.125]
+
+    for coordinator in coordinators:
+        scheduler.async_remove(coordinator)
+    assert scheduler.empty
+
+
+async def test_removal_rebalances_once_settled(hass):
+    scheduler = HttpcontrolScheduler(hass)
+    coordinators = [_Coordinator(f"box{index}") for index in range(4)]
+    for coordinator in coordinators:
+        scheduler.async_add(coordinator)
+    scheduler.async_remove(coordinators[1])
+    assert [scheduler._phases[coordinator] for coordinator in coordinators[2:]] == [0.25, 0.75]
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=REBALANCE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert list(scheduler._phases.values()) == [0, 1 / 3, 2 / 3]
+
+    # the next device goes between two evenly spaced ones
+    scheduler.async_add(coordinators[1])
+    assert scheduler._phases[coordinators[1]] == 1 / 6
+
+    for coordinator in list(scheduler._phases):
+        scheduler.async_remove(coordinator)
+
+
+async def test_adding_a_large_fleet_is_not_quadratic(hass):
+    scheduler = HttpcontrolScheduler(hass)
+    coordinators = [_Coordinator(f"box{index}") for index in range(2000)]
+    start = perf_counter()
+    for coordinator in coordinators:
+        scheduler.async_add(coordinator)
+    for coordinator in coordinators:
+        scheduler.async_remove(coordinator)
+    assert perf_counter() - start < 1
+    assert scheduler.empty
+
+
+def test_lag_percentiles_stay_within_samples():
+    scheduler = HttpcontrolScheduler(None)
+    scheduler._lags.extend([0.001, 0.002, 0.5])
+    stats = scheduler.stats
+    assert stats["lag_p50"] == 0.002
+    assert stats["lag_p99"] <= stats["lag_max"] == 0.5